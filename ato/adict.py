@@ -1,18 +1,16 @@
+import copy
 import hashlib
 import importlib.util
-import json
 import sys
 import types
 import warnings
 from collections.abc import MutableMapping as GenericMapping
 
-import toml
-import yaml
 import os
+from collections.abc import Mapping, MutableMapping, Callable
 from copy import deepcopy as dcp
 from functools import wraps
 from types import MappingProxyType
-from typing import Mapping, MutableMapping, Callable
 
 from ato import xyz
 
@@ -97,7 +95,6 @@ class Dict(GenericMapping):
     def copy(self):
         if self.__class__ is Dict:
             return Dict(self._data.copy())
-        import copy
         data = self._data
         try:
             self._data = dict()
@@ -362,6 +359,7 @@ class ADict(Dict):
 
     @mutate_attribute
     def json(self):
+        import json
         return json.dumps(self.to_dict())
 
     def clone(self):
@@ -386,12 +384,15 @@ class ADict(Dict):
         if os.path.exists(path):
             ext = os.path.splitext(path)[1].lower()
             if ext in ('.yml', '.yaml'):
+                import yaml
                 with open(path, 'rb') as f:
                     return cls(yaml.load(f, Loader=yaml.FullLoader))
             elif ext == '.toml':
+                import toml
                 with open(path, 'r') as f:
                     return cls(toml.load(f))
             elif ext == '.json':
+                import json
                 with open(path, 'r') as f:
                     obj = json.load(f)
                     if isinstance(obj, list):
@@ -399,6 +400,7 @@ class ADict(Dict):
                     else:
                         return cls(obj)
             elif ext == '.jsonl':
+                import json
                 with open(path, 'r') as f:
                     dict_list = json.load(f)
                     return [cls(item) for item in dict_list]
@@ -473,13 +475,15 @@ class ADict(Dict):
         if os.path.exists(path):
             ext = os.path.splitext(path)[1].lower()
             if ext in ('.yml', '.yaml'):
+                import yaml
                 with open(path, 'rb') as f:
                     self._data = yaml.load(f, Loader=yaml.FullLoader)
             elif ext == '.json':
+                import json
                 with open(path, 'r') as f:
                     self._data = json.load(f, **kwargs)
             elif ext == '.xyz':
-                self._data = xyz.load(path)
+                self._data = xyz.load(path, **kwargs)
             elif ext == '.py':
                 self._data = self.compile_from_file(path).to_dict()
             else:
@@ -553,12 +557,15 @@ class ADict(Dict):
         os.makedirs(dir_path, exist_ok=True)
         ext = os.path.splitext(path)[1].lower()
         if ext in ('.yml', '.yaml'):
+            import yaml
             with open(path, 'w') as f:
                 return yaml.dump(self.to_dict(), f, Dumper=yaml.Dumper, **kwargs)
         elif ext == '.toml':
+            import toml
             with open(path, 'w') as f:
                 return toml.dump(self.to_dict(), f, **kwargs)
         elif ext == '.json':
+            import json
             with open(path, 'w') as f:
                 return json.dump(self.to_dict(), f, **kwargs)
         elif ext == '.xyz':
@@ -0,0 +1,52 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from ato.adict import ADict
+
+
+class ResolvedConfigCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.stats = ADict(hits=0, misses=0, stores=0)
+
+    @classmethod
+    def get_key(cls, manifest):
+        return hashlib.sha256(repr(manifest).encode('utf-8')).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def get(self, manifest):
+        path = self.get_path(self.get_key(manifest))
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            entry = None
+        # the full manifest is stored as well, so a stale or colliding entry is never served
+        if entry is None or entry.get('manifest') != manifest:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return entry['config']
+
+    def put(self, manifest, config):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.get_path(self.get_key(manifest))
+        descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                pickle.dump(dict(manifest=manifest, config=config), f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.stats.stores += 1
+
+    def clear(self):
+        if os.path.isdir(self.cache_dir):
+            for file_name in os.listdir(self.cache_dir):
+                if file_name.endswith('.pkl'):
+                    os.unlink(os.path.join(self.cache_dir, file_name))
@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Text, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -81,3 +81,22 @@ class Fingerprint(Base):
     fingerprint = Column(String(128), nullable=False, index=True)  # hash value
 
     run = relationship('Experiment', back_populates='fingerprints')
+
+
+# snapshot of the search state of a hyperparameter optimizer
+class HyperOptCheckpoint(Base):
+    __tablename__ = 'hyperopt_checkpoints'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False, index=True)
+    state = Column(LargeBinary, nullable=False)  # pickled search state
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
+# finished trials and state updates since the last snapshot, replayed in id order
+class HyperOptCheckpointRecord(Base):
+    __tablename__ = 'hyperopt_checkpoint_records'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, index=True)
+    record = Column(LargeBinary, nullable=False)  # pickled record
@@ -0,0 +1,133 @@
+import bisect
+import math
+import random
+from copy import deepcopy as dcp
+
+from ato.adict import ADict
+from ato.hyperopt.base import HyperOpt, GridSpaceMixIn
+
+
+class ASHA(HyperOpt, GridSpaceMixIn):
+    def __init__(
+        self,
+        scope,
+        search_spaces,
+        halving_rate,
+        max_budget,
+        min_budget=1,
+        num_trials=None,
+        tracker=None,
+        mode='max',
+        executor=None,
+        budget_key='__budget__',
+        seed=None,
+        space_options=None,
+        pruner=None
+    ):
+        if halving_rate <= 0 or halving_rate >= 1:
+            raise ValueError(f'halving_rate must be greater than 0.0 but less than 1.0, but got {halving_rate}.')
+        if not 0 < min_budget <= max_budget:
+            raise ValueError(f'min_budget must be in (0, max_budget], but got {min_budget} with max_budget {max_budget}.')
+        from ato.hyperopt.executors import AsyncTrialExecutor
+        if isinstance(executor, AsyncTrialExecutor):
+            raise ValueError(
+                'ASHA submits one trial whenever a worker frees up, which AsyncTrialExecutor does not support; '
+                'use ProcessPoolTrialExecutor, which also runs async estimators.'
+            )
+        super().__init__(scope, search_spaces, tracker, mode, executor, pruner)
+        self.halving_rate = halving_rate
+        self.max_budget = max_budget
+        self.min_budget = min_budget
+        self.budget_key = budget_key
+        self.seed = seed
+        self.space_options = space_options or dict()
+        self.distributions = self.prepare_distributions(self.config, self.search_spaces, **self.space_options)
+        self.num_trials = len(self.distributions) if num_trials is None else min(num_trials, len(self.distributions))
+
+    @classmethod
+    def prepare_distributions(cls, base_config, search_spaces, **kwargs):
+        return super().prepare_distributions(base_config, search_spaces, __num_halved__=0, **kwargs)
+
+    def get_executor(self, estimator):
+        if self.executor is None:
+            from ato.hyperopt.executors import ProcessPoolTrialExecutor
+            return ProcessPoolTrialExecutor()
+        return self.executor
+
+    def get_budgets(self):
+        rate = self.halving_rate
+        num_rungs = int(math.log(self.min_budget/self.max_budget)/math.log(rate)+1e-9)+1
+        budgets = [self.max_budget*math.pow(rate, num_rungs-1-index) for index in range(num_rungs)]
+        if isinstance(self.max_budget, int) and isinstance(self.min_budget, int):
+            budgets = [max(round(budget), 1) for budget in budgets]
+        return budgets
+
+    def get_promotable(self, ranked, promoted):
+        # the best unpromoted config among the top rate-th of the highest rung that has one
+        for rung in reversed(range(len(ranked)-1)):
+            entries = ranked[rung]
+            for _, index in entries[:int(len(entries)*self.halving_rate)]:
+                if index not in promoted[rung]:
+                    return rung, index
+        return None
+
+    def rank(self, entries, config, index):
+        # every rung stays sorted best first, ties in the order they finished
+        metric = config.__metric__
+        bisect.insort(entries, (-metric if self.mode == 'max' else metric, index))
+
+    def main(self, func):
+        def launch(*args, **kwargs):
+            from concurrent.futures import FIRST_COMPLETED, wait
+            rng = random.Random(self.seed)
+            sampled = self.distributions.sample(self.num_trials, rng)
+            order = list(range(len(sampled)))
+            rng.shuffle(order)
+            candidates = (sampled[index] for index in order)
+            budgets = self.get_budgets()
+            rungs = [[] for _ in budgets]
+            ranked = [[] for _ in budgets]
+            promoted = [set() for _ in budgets]
+            promotions = []
+            pending = dict()
+            total_budget = 0
+            with self.open_session(func, *args, **kwargs) as session:
+                while True:
+                    while len(pending) < session.num_workers:
+                        job = self.get_promotable(ranked, promoted)
+                        if job is not None:
+                            rung, index = job
+                            promoted[rung].add(index)
+                            config = dcp(rungs[rung][index])
+                            config.__num_halved__ += 1
+                            rung += 1
+                            promotions.append(ADict(rung=rung, budget=budgets[rung], config=config))
+                        else:
+                            config = next(candidates, None)
+                            if config is None:
+                                break
+                            rung = 0
+                        config[self.budget_key] = budgets[rung]
+                        pending[session.submit(config)] = rung
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        rung = pending.pop(future)
+                        config = session.collect(future)
+                        self.rank(ranked[rung], config, len(rungs[rung]))
+                        rungs[rung].append(config)
+                        total_budget += budgets[rung]
+            logs = [
+                sorted(results, key=lambda item: item.__metric__, reverse=self.mode == 'max')
+                for results in rungs if results
+            ]
+            best_config = logs[-1][0]
+            return ADict(
+                config=best_config,
+                metric=best_config.__metric__,
+                logs=logs,
+                promotions=promotions,
+                total_budget=total_budget
+            )
+        return launch
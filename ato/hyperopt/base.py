@@ -1,24 +1,46 @@
+import importlib.util
 import math
+import random
 import uuid
-from copy import deepcopy as dcp
-from itertools import product
+from collections.abc import Sequence
+from contextlib import contextmanager
+from copy import copy, deepcopy as dcp
 
-import numpy as np
+from ato.adict import ADict
 
-try:
-    import torch
-    import torch.distributed as dist
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
-    torch = None
-    dist = None
 
-from ato.adict import ADict
+# torch is optional and heavy, so it is only imported when a distributed backend is used
+def __getattr__(name):
+    if name == 'TORCH_AVAILABLE':
+        return importlib.util.find_spec('torch') is not None
+    elif name == 'torch':
+        return _import_torch()[0]
+    elif name == 'dist':
+        return _import_torch()[1]
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def _import_torch():
+    try:
+        import torch
+        import torch.distributed as dist
+    except ImportError:
+        return None, None
+    return torch, dist
 
 
 class HyperOpt:
-    def __init__(self, scope, search_spaces, tracker=None, mode='max'):
+    def __init__(
+        self,
+        scope,
+        search_spaces,
+        tracker=None,
+        mode='max',
+        executor=None,
+        pruner=None,
+        checkpoint=None,
+        cache=None
+    ):
         if mode not in ('min', 'max'):
             raise ValueError('mode must be either "min" or "max".')
         self.scope = scope
@@ -26,6 +48,14 @@ class HyperOpt:
         self.config = scope.config.clone()
         self.tracker = tracker
         self.mode = mode
+        self.executor = executor
+        self.pruner = pruner
+        self.checkpoint = checkpoint
+        self.cache = cache
+        self.session = None
+        self.state = None
+        self.completed = dict()
+        self.num_journaled = 0
         self.config.__hyperopt_id__ = self.get_hyperopt_id()
 
     @classmethod
@@ -35,10 +65,180 @@ class HyperOpt:
     def main(self, func):
         raise NotImplementedError()
 
+    def restore_checkpoint(self, state):
+        # state is the search progress of main(); completed holds the finished trials of the current estimate()
+        saved = None if self.checkpoint is None else self.checkpoint.load()
+        state.update(completed=[], num_records=0)
+        if saved is not None:
+            state, records = saved
+            for record in records:
+                self.apply_record(state, record)
+            self.num_journaled = len(records)
+            self.config.__hyperopt_id__ = state.hyperopt_id
+        state.hyperopt_id = self.config.__hyperopt_id__
+        self.completed = dict(state.completed)
+        self.state = state
+        if saved is None:
+            self.save_checkpoint()
+        return state
+
+    @classmethod
+    def apply_record(cls, state, record):
+        # a trial finished inside estimate(); any other update happens between estimate() calls and closes it
+        kind, *payload = record
+        if kind == 'trial':
+            state.completed.append(tuple(payload))
+        else:
+            extend, changes = payload
+            for key, items in extend.items():
+                state[key].extend(items)
+            state.update(changes, completed=[])
+        state.num_records += 1
+
+    def save_checkpoint(self):
+        if self.checkpoint is not None and self.state is not None:
+            self.checkpoint.save(self.state)
+            self.num_journaled = 0
+
+    def append_checkpoint(self, record):
+        # only the record is written, until the journal is as long as the history a snapshot would fold into it
+        if self.state is None:
+            return
+        self.apply_record(self.state, record)
+        if self.checkpoint is None:
+            return
+        self.num_journaled += 1
+        if self.num_journaled < max(self.state.num_records-self.num_journaled, 64):
+            self.checkpoint.append(record)
+        else:
+            self.save_checkpoint()
+
+    def update_state(self, extend=None, **changes):
+        # extend appends to the lists of state, changes replace its fields
+        self.append_checkpoint(('update', extend or dict(), changes))
+
+    def get_executor(self, estimator):
+        import inspect
+        if self.executor is None and inspect.iscoroutinefunction(estimator):
+            from ato.hyperopt.executors import AsyncTrialExecutor
+            return AsyncTrialExecutor()
+        return self.executor
+
+    @contextmanager
+    def open_session(self, estimator, *args, **kwargs):
+        # workers are started once and reused by every estimate() call inside the session
+        executor = self.get_executor(estimator)
+        if executor is None or self.session is not None:
+            yield self.session
+            return
+        with executor.open(self, estimator, *args, **kwargs) as session:
+            self.session = session
+            try:
+                yield session
+            finally:
+                self.session = None
+
+    def estimate(self, estimator, distributions, *args, **kwargs):
+        results = [self.completed.get(index) for index in range(len(distributions))]
+        indices = [index for index, result in enumerate(results) if result is None]
+
+        def complete(position, config):
+            index = indices[position]
+            results[index] = self.completed[index] = config
+            self.append_checkpoint(('trial', index, config))
+
+        configs = self.iter_configs(distributions, indices)
+        if self.cache is not None:
+            configs, complete = self.deduplicate(configs, complete)
+        if self.session is not None or self.get_executor(estimator) is not None:
+            with self.open_session(estimator, *args, **kwargs) as session:
+                session.map(configs, complete)
+        else:
+            for position, config in enumerate(configs):
+                config.__metric__ = self.run_trial(estimator, config, *args, **kwargs)
+                complete(position, config)
+        self.completed.clear()
+        return results
+
+    @classmethod
+    def iter_configs(cls, distributions, indices):
+        # a config is built and copied only when a trial takes it; a search space builds a fresh one on every read
+        for index in indices:
+            config = distributions[index]
+            yield config if isinstance(distributions, SearchSpace) else dcp(config)
+
+    def get_budget(self, config):
+        return None
+
+    def deduplicate(self, configs, complete):
+        # identical (config, budget) pairs are trained once; keys are computed as the configs stream past
+        groups = dict()
+        finished = dict()
+        keys = []
+
+        def iter_unique():
+            for position, config in enumerate(configs):
+                key = self.cache.get_key(config, self.get_budget(config))
+                if key in finished:
+                    self.cache.stats.hits += 1
+                    complete(position, dcp(finished[key]))
+                elif key in groups:
+                    self.cache.stats.hits += 1
+                    groups[key].append(position)
+                else:
+                    entry = self.cache.get(key)
+                    if entry is not None:
+                        complete(position, self.cache.restore(config, entry))
+                        continue
+                    groups[key] = [position]
+                    keys.append(key)
+                    yield config
+
+        def complete_unique(position, config):
+            key = keys[position]
+            self.cache.put(key, config)
+            first, *others = groups.pop(key)
+            finished[key] = config
+            complete(first, config)
+            for other in others:
+                complete(other, dcp(config))
+
+        return iter_unique(), complete_unique
+
+    def estimate_cached_run(self, estimator, config, *args, **kwargs):
+        if self.cache is None:
+            return self.estimate_single_run(estimator, config, *args, **kwargs)
+        key = self.cache.get_key(config, self.get_budget(config))
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry['metric']
+        metric = self.estimate_single_run(estimator, config, *args, **kwargs)
+        result = dcp(config)
+        result.__metric__ = metric
+        self.cache.put(key, result)
+        return metric
+
+    def run_trial(self, estimator, config, *args, **kwargs):
+        from ato.hyperopt.pruning import run_trial
+        metric, trial = run_trial(
+            lambda: self.estimate_single_run(estimator, config, *args, **kwargs),
+            config,
+            self.pruner,
+            self.mode
+        )
+        if self.pruner is not None:
+            self.pruner.add_trial(trial)
+        return metric
+
+    def estimate_single_run(self, estimator, config, *args, **kwargs):
+        from ato.hyperopt.executors import resolve_metric
+        self.scope.config = config
+        return resolve_metric(self.scope(estimator)(*args, **kwargs))
+
 
 class DistributedMixIn:
     def __init__(self, rank=0, world_size=1, backend='pytorch'):
-        if not TORCH_AVAILABLE:
+        if _import_torch()[0] is None:
             raise RuntimeError('DistributedMixin requires PyTorch to be installed.')
         self.rank = rank
         self.world_size = world_size
@@ -50,6 +250,7 @@ class DistributedMixIn:
 
     def broadcast_object_from_root(self, obj):
         if self.backend == 'pytorch':
+            dist = _import_torch()[1]
             obj = [obj]
             dist.broadcast_object_list(obj)
             obj = obj[0]
@@ -59,6 +260,7 @@ class DistributedMixIn:
 
     def all_gather_object(self, obj):
         if self.backend == 'pytorch':
+            dist = _import_torch()[1]
             gathered_objects = [None for _ in range(self.world_size)]
             dist.all_gather_object(gathered_objects, obj)
         else:
@@ -67,6 +269,7 @@ class DistributedMixIn:
 
     def destroy(self):
         if self.backend == 'pytorch':
+            dist = _import_torch()[1]
             if dist.is_initialized():
                 dist.destroy_process_group()
         else:
@@ -91,9 +294,87 @@ class DistributedHyperOpt(DistributedMixIn, HyperOpt):
         DistributedMixIn.__init__(self, rank, world_size, backend)
 
 
+class SearchSpace(Sequence):
+    # a lazy sequence of trial configs; subclasses decode an index into the sampled parameters
+    def __init__(self, base_config, size, extra_fields=None, indices=None):
+        self.base_config = base_config
+        self.extra_fields = extra_fields or dict()
+        self.indices = range(size) if indices is None else indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.with_indices(self.indices[index])
+        return self.get_config(self.indices[index])
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(size={len(self)}, params={self.param_names})'
+
+    @property
+    def param_names(self):
+        raise NotImplementedError()
+
+    def get_partial_config(self, index):
+        raise NotImplementedError()
+
+    def get_config(self, index):
+        config = dcp(self.base_config).update(**self.get_partial_config(index))
+        config.update(**self.extra_fields)
+        return config
+
+    def with_indices(self, indices):
+        space = copy(self)
+        space.indices = indices
+        return space
+
+    def sample(self, num_samples, rng=None):
+        rng = rng or random
+        return self.with_indices(sorted(rng.sample(self.indices, num_samples)))
+
+
+class GridSpace(SearchSpace):
+    # the Cartesian product of sampling_spaces in itertools.product order, addressed by mixed-radix indices
+    def __init__(self, base_config, sampling_spaces, extra_fields=None, indices=None):
+        self.sampling_spaces = sampling_spaces
+        self.strides = []
+        size = 1
+        for values in reversed(list(sampling_spaces.values())):
+            self.strides.insert(0, size)
+            size *= len(values)
+        super().__init__(base_config, size, extra_fields, indices)
+
+    @property
+    def param_names(self):
+        return list(self.sampling_spaces.keys())
+
+    def get_partial_config(self, index):
+        return ADict(
+            (param_name, values[index//stride%len(values)])
+            for (param_name, values), stride in zip(self.sampling_spaces.items(), self.strides)
+        )
+
+
+class SampledSpace(SearchSpace):
+    # one column of sampled values per parameter; trial i takes row i
+    def __init__(self, base_config, samples, extra_fields=None, indices=None):
+        self.samples = samples
+        size = len(next(iter(samples.values()))) if samples else 0
+        super().__init__(base_config, size, extra_fields, indices)
+
+    @property
+    def param_names(self):
+        return list(self.samples.keys())
+
+    def get_partial_config(self, index):
+        return ADict((param_name, values[index]) for param_name, values in self.samples.items())
+
+
 class GridSpaceMixIn:
     @classmethod
-    def prepare_distributions(cls, base_config, search_spaces):
+    def prepare_distributions(cls, base_config, search_spaces, **extra_fields):
+        import numpy as np
         sampling_spaces = ADict()
         for param_name, search_space in search_spaces.items():
             if 'param_type' not in search_space:
@@ -146,9 +427,135 @@ class GridSpaceMixIn:
             else:
                 raise ValueError(f'Unknown param_type for parameter {param_name}; {param_type}')
             sampling_spaces[param_name] = optim_space
-        grid_space = [ADict(zip(sampling_spaces.keys(), values)) for values in product(*sampling_spaces.values())]
-        distributions = [
-            dcp(base_config).update(**partial_config)
-            for index, partial_config in enumerate(grid_space)
-        ]
-        return distributions
+        return GridSpace(base_config, sampling_spaces, extra_fields)
+
+
+# Joe and Kuo (new-joe-kuo-6.21201) primitive polynomials and initial direction numbers for dimensions 2-21
+_SOBOL_DIRECTIONS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69))
+)
+_SOBOL_BITS = 30
+
+
+def get_sobol_directions(num_dims):
+    import numpy as np
+    if num_dims > len(_SOBOL_DIRECTIONS)+1:
+        raise ValueError(f'Sobol sequences support up to {len(_SOBOL_DIRECTIONS)+1} parameters, but got {num_dims}.')
+    bits = _SOBOL_BITS
+    directions = np.zeros((num_dims, bits), dtype=np.int64)
+    directions[0] = 1 << np.arange(bits-1, -1, -1)
+    for dim, (degree, coefficients, initial) in enumerate(_SOBOL_DIRECTIONS[:num_dims-1], start=1):
+        v = [m << (bits-index-1) for index, m in enumerate(initial)]
+        for index in range(degree, bits):
+            value = v[index-degree]^(v[index-degree] >> degree)
+            for k in range(1, degree):
+                if (coefficients >> (degree-1-k)) & 1:
+                    value ^= v[index-k]
+            v.append(value)
+        directions[dim] = v[:bits]
+    return directions
+
+
+def sample_sobol(num_samples, num_dims, rng, scramble=True):
+    import numpy as np
+    bits = _SOBOL_BITS
+    if num_samples > 1 << bits:
+        raise ValueError(f'Sobol sequences support up to 2**{bits} samples, but got {num_samples}.')
+    directions = get_sobol_directions(num_dims)
+    shifts = np.zeros(num_dims, dtype=np.int64)
+    if scramble:
+        # linear matrix scrambling and a digital shift keep the net property of every power-of-two prefix
+        powers = 1 << np.arange(bits-1, -1, -1)
+        lower = np.tril(rng.integers(0, 2, size=(num_dims, bits, bits)), -1)+np.eye(bits, dtype=np.int64)
+        direction_bits = (directions[:, :, None] >> np.arange(bits-1, -1, -1)) & 1
+        directions = ((direction_bits @ lower.transpose(0, 2, 1)) % 2) @ powers
+        shifts = rng.integers(0, 1 << bits, size=num_dims)
+    points = np.zeros((num_samples, num_dims), dtype=np.int64)
+    indices = np.arange(num_samples)
+    for bit in range(min(bits, max(num_samples-1, 1).bit_length())):
+        points ^= ((indices >> bit) & 1)[:, None]*directions[:, bit]
+    return (points ^ shifts)/float(1 << bits)
+
+
+class SampledSpaceMixIn(GridSpaceMixIn):
+    @classmethod
+    def sample_unit_cube(cls, num_samples, num_dims, rng):
+        raise NotImplementedError()
+
+    @classmethod
+    def prepare_distributions(cls, base_config, search_spaces, num_samples=None, seed=None, **extra_fields):
+        import numpy as np
+        if num_samples is None:
+            raise ValueError(f'{cls.__name__} draws a fixed number of configs, so num_samples must be given.')
+        rng = np.random.default_rng(seed)
+        unit_samples = cls.sample_unit_cube(num_samples, len(search_spaces), rng)
+        return SampledSpace(base_config, cls.convert_unit_samples(search_spaces, unit_samples), extra_fields)
+
+    @classmethod
+    def convert_unit_samples(cls, search_spaces, unit_samples):
+        import numpy as np
+        samples = ADict()
+        for (param_name, search_space), u in zip(search_spaces.items(), unit_samples.T):
+            if 'param_type' not in search_space:
+                raise KeyError(f'param_type for parameter {param_name} is not defined at search_spaces.')
+            param_type = search_space['param_type'].upper()
+            space_type = search_space.get('space_type', 'LINEAR')
+            if param_type in ('INTEGER', 'FLOAT'):
+                start, stop = search_space.param_range
+                if param_type == 'INTEGER':
+                    stop += 1
+                if space_type == 'LINEAR':
+                    values = start+u*(stop-start)
+                elif space_type == 'LOG':
+                    values = np.exp(np.log(start)+u*(np.log(stop)-np.log(start)))
+                else:
+                    raise ValueError(f'Invalid space_type: {space_type}')
+                if param_type == 'INTEGER':
+                    values = np.minimum(np.floor(values), stop-1).astype(np.int64)
+                samples[param_name] = values.tolist()
+            elif param_type == 'CATEGORY':
+                categories = search_space.categories
+                indices = np.minimum(u*len(categories), len(categories)-1).astype(np.int64)
+                samples[param_name] = [categories[index] for index in indices.tolist()]
+            else:
+                raise ValueError(f'Unknown param_type for parameter {param_name}; {param_type}')
+        return samples
+
+
+class RandomSpaceMixIn(SampledSpaceMixIn):
+    @classmethod
+    def sample_unit_cube(cls, num_samples, num_dims, rng):
+        return rng.random((num_samples, num_dims))
+
+
+class LatinHypercubeSpaceMixIn(SampledSpaceMixIn):
+    @classmethod
+    def sample_unit_cube(cls, num_samples, num_dims, rng):
+        # an independent random permutation of the strata per column, jittered within each stratum
+        strata = rng.random((num_samples, num_dims)).argsort(axis=0)
+        return (strata+rng.random((num_samples, num_dims)))/num_samples
+
+
+class SobolSpaceMixIn(SampledSpaceMixIn):
+    @classmethod
+    def sample_unit_cube(cls, num_samples, num_dims, rng):
+        return sample_sobol(num_samples, num_dims, rng)
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from copy import deepcopy as dcp
+
+from ato.adict import ADict
+from ato.hyperopt.pruning import reset_outcome
+
+
+def _is_dunder(key):
+    return isinstance(key, str) and key.startswith('__') and key.endswith('__')
+
+
+class TrialCache:
+    # metric and resulting fields of every evaluated (config, budget) pair, in memory and optionally on disk
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.entries = dict()
+        self.stats = ADict(hits=0, misses=0, stores=0)
+
+    @classmethod
+    def get_key(cls, config, budget=None):
+        import json
+        # bookkeeping fields such as __metric__ or __hyperopt_id__ do not change what is trained
+        content = {key: value for key, value in config.to_dict().items() if not _is_dunder(key)}
+        payload = json.dumps([content, budget], sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None and self.cache_dir is not None:
+            try:
+                with open(self.get_path(key), 'rb') as f:
+                    entry = self.entries[key] = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                entry = None
+        if entry is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return entry
+
+    def put(self, key, config):
+        # pruned or cancelled trials depend on their peers, so their metric is not a property of the config
+        if config.get('__pruned__') or config.get('__cancelled__'):
+            return
+        entry = self.entries[key] = dict(
+            metric=config.__metric__,
+            fields={key: value for key, value in config.to_dict().items() if not _is_dunder(key)}
+        )
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'wb') as f:
+                    pickle.dump(entry, f)
+                os.replace(temp_path, self.get_path(key))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        self.stats.stores += 1
+
+    @classmethod
+    def restore(cls, config, entry):
+        config = dcp(config)
+        reset_outcome(config)
+        config.update(**dcp(entry['fields']))
+        config.__metric__ = entry['metric']
+        return config
+
+    def clear(self):
+        self.entries.clear()
+        if self.cache_dir is not None and os.path.isdir(self.cache_dir):
+            for file_name in os.listdir(self.cache_dir):
+                if file_name.endswith('.pkl'):
+                    os.unlink(os.path.join(self.cache_dir, file_name))
@@ -0,0 +1,99 @@
+import os
+import pickle
+import tempfile
+
+
+class FileCheckpoint:
+    # a snapshot of the search state followed by the records appended since, each one pickle in the same file
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+                records = []
+                end = f.tell()
+                while True:
+                    try:
+                        records.append(pickle.load(f))
+                    except (EOFError, pickle.UnpicklingError):
+                        break
+                    end = f.tell()
+        except FileNotFoundError:
+            return None
+        # a record cut short by a crash is dropped, so the next one is appended after the last complete record
+        if end < os.path.getsize(self.path):
+            os.truncate(self.path, end)
+        return state, records
+
+    def save(self, state):
+        # written to a temporary file and renamed, so a crash leaves either the old or the new state
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def append(self, record):
+        with open(self.path, 'ab') as f:
+            f.write(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class SQLCheckpoint:
+    def __init__(self, db_path, name):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from ato.db_routers.sql.schema import HyperOptCheckpoint, HyperOptCheckpointRecord
+        self.name = name
+        self.engine = create_engine(db_path)
+        HyperOptCheckpoint.__table__.create(self.engine, checkfirst=True)
+        HyperOptCheckpointRecord.__table__.create(self.engine, checkfirst=True)
+        self.session_maker = sessionmaker(bind=self.engine)
+
+    @classmethod
+    def from_tracker(cls, tracker, name):
+        return cls(tracker.config.experiment.sql.db_path, name)
+
+    def load(self):
+        from ato.db_routers.sql.schema import HyperOptCheckpoint, HyperOptCheckpointRecord
+        with self.session_maker() as session:
+            checkpoint = session.query(HyperOptCheckpoint).filter_by(name=self.name).first()
+            if checkpoint is None:
+                return None
+            rows = session.query(HyperOptCheckpointRecord.record).filter_by(name=self.name)
+            records = [pickle.loads(record) for record, in rows.order_by(HyperOptCheckpointRecord.id)]
+            return pickle.loads(checkpoint.state), records
+
+    def save(self, state):
+        # one transaction per save, so readers see either the old or the new state
+        from ato.db_routers.sql.schema import HyperOptCheckpoint, HyperOptCheckpointRecord
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.session_maker() as session, session.begin():
+            checkpoint = session.query(HyperOptCheckpoint).filter_by(name=self.name).first()
+            if checkpoint is None:
+                session.add(HyperOptCheckpoint(name=self.name, state=data))
+            else:
+                checkpoint.state = data
+            session.query(HyperOptCheckpointRecord).filter_by(name=self.name).delete()
+
+    def append(self, record):
+        from ato.db_routers.sql.schema import HyperOptCheckpointRecord
+        data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.session_maker() as session, session.begin():
+            session.add(HyperOptCheckpointRecord(name=self.name, record=data))
+
+    def clear(self):
+        from ato.db_routers.sql.schema import HyperOptCheckpoint, HyperOptCheckpointRecord
+        with self.session_maker() as session, session.begin():
+            session.query(HyperOptCheckpoint).filter_by(name=self.name).delete()
+            session.query(HyperOptCheckpointRecord).filter_by(name=self.name).delete()
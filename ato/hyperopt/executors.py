@@ -0,0 +1,230 @@
+import inspect
+import os
+from contextlib import contextmanager
+from functools import partial
+
+from ato.adict import ADict
+
+
+_trial_fn = None
+
+
+def _initialize_worker(trial_fn):
+    global _trial_fn
+    _trial_fn = trial_fn
+
+
+def _run_in_worker(config, pruner):
+    return _trial_fn(config, pruner)
+
+
+def resolve_metric(metric):
+    if inspect.isawaitable(metric):
+        import asyncio
+        metric = asyncio.run(_await(metric))
+    return metric
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def _call_with_config(estimator, scope_name, mode, args, kwargs, config, pruner):
+    # configs arrive resolved, so the worker scope only injects them; pruner holds the thresholds of the finished curves
+    from ato.hyperopt.pruning import run_trial
+    from ato.scope import Scope
+    with Scope.isolated(arguments=[]):
+        Scope.initialize_registry()
+        scope = Scope(config=ADict(config), name=scope_name)
+        trial_fn = partial(scope(estimator), *args, **kwargs)
+        metric, trial = run_trial(lambda: resolve_metric(trial_fn()), scope.config, pruner, mode)
+        return metric, scope.config.to_dict(), (trial.steps, trial.values)
+
+
+class _TrialSession:
+    def __init__(self, pool, num_workers, max_pending, pruner=None, mode='max'):
+        self.pool = pool
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self.pruner = pruner
+        self.mode = mode
+        self.pending = set()
+
+    def get_worker_pruner(self):
+        if hasattr(self.pruner, 'get_snapshot'):
+            return self.pruner.get_snapshot(self.mode)
+        return self.pruner
+
+    def submit(self, config):
+        future = self.pool.submit(_run_in_worker, config.to_dict(), self.get_worker_pruner())
+        self.pending.add(future)
+        return future
+
+    def collect(self, future):
+        self.pending.discard(future)
+        metric, config, curve = future.result()
+        if self.pruner is not None:
+            self.pruner.add_curve(*curve)
+        config = ADict(config)
+        config.__metric__ = metric
+        return config
+
+    def map(self, configs, callback=None):
+        # configs may be a generator; each one is taken only when there is room for it in the queue
+        from concurrent.futures import FIRST_COMPLETED, wait
+        results = []
+        pending = dict()
+        configs = enumerate(configs)
+        for index, config in configs:
+            results.append(None)
+            pending[self.submit(config)] = index
+            if len(pending) >= self.max_pending:
+                break
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    results[index] = self.collect(future)
+                    if callback is not None:
+                        callback(index, results[index])
+                for index, config in configs:
+                    results.append(None)
+                    pending[self.submit(config)] = index
+                    if len(pending) >= self.max_pending:
+                        break
+        finally:
+            for future in pending:
+                future.cancel()
+        return results
+
+
+class ProcessPoolTrialExecutor:
+    def __init__(self, num_workers=None, mp_context=None, max_pending=None):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.mp_context = mp_context
+        # bounds how many configs are pickled and queued ahead of the workers
+        self.max_pending = max_pending or self.num_workers*2
+
+    @contextmanager
+    def open(self, hyperopt, estimator, *args, **kwargs):
+        from concurrent.futures import ProcessPoolExecutor
+        trial_fn = partial(_call_with_config, estimator, hyperopt.scope.name, hyperopt.mode, args, kwargs)
+        pool = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=self.mp_context,
+            initializer=_initialize_worker,
+            initargs=(trial_fn,)
+        )
+        session = _TrialSession(pool, self.num_workers, self.max_pending, hyperopt.pruner, hyperopt.mode)
+        try:
+            yield session
+        except BaseException:
+            # queued trials are dropped and running ones are not waited for, so an error surfaces right away
+            for future in session.pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+            raise
+        pool.shutdown(wait=True)
+
+
+class _AsyncTrialSession:
+    def __init__(self, executor, hyperopt, estimator, args, kwargs):
+        import asyncio
+        self.executor = executor
+        self.scope = hyperopt.scope
+        self.mode = hyperopt.mode
+        self.pruner = hyperopt.pruner
+        self.worst_metric = float('-inf') if hyperopt.mode == 'max' else float('inf')
+        self.trial = self.scope(estimator)
+        self.args = args
+        self.kwargs = kwargs
+        self.loop = asyncio.new_event_loop()
+
+    def close(self):
+        self.loop.close()
+
+    def map(self, configs, callback=None):
+        return self.loop.run_until_complete(self._map(configs, callback))
+
+    async def _map(self, configs, callback):
+        import asyncio
+        from ato.hyperopt.pruning import reset_outcome
+        from ato.scope import Scope
+        # without a concurrency bound every trial runs at once; otherwise a worker takes the next config when it is free
+        if self.executor.max_concurrency is None:
+            configs = list(configs)
+        num_workers = self.executor.max_concurrency or len(configs)
+        configs = enumerate(configs)
+        taken = []
+        finished = set()
+
+        async def work():
+            for index, config in configs:
+                # a trial cancelled before it starts must not keep the outcome of the rung it was promoted from
+                reset_outcome(config)
+                taken.append((index, config))
+                config.__metric__ = await self._run_trial(config)
+                finished.add(index)
+                if callback is not None:
+                    callback(index, config)
+
+        workers = []
+        for _ in range(num_workers):
+            # every worker copies the current context, so each trial sees its own config through the scope
+            with Scope.isolated():
+                workers.append(asyncio.ensure_future(work()))
+        if not workers:
+            return []
+        _, pending = await asyncio.wait(workers, timeout=self.executor.rung_timeout)
+        for worker in pending:
+            worker.cancel()
+        for result in await asyncio.gather(*workers, return_exceptions=True):
+            if isinstance(result, BaseException) and not isinstance(result, asyncio.CancelledError):
+                raise result
+        # trials cut off by the rung timeout and configs that no worker reached count as cancelled
+        for index, config in configs:
+            reset_outcome(config)
+            taken.append((index, config))
+        for index, config in taken:
+            if index not in finished:
+                config.__cancelled__ = True
+                config.__metric__ = self.worst_metric
+                if callback is not None:
+                    callback(index, config)
+        return [config for _, config in taken]
+
+    async def _run_trial(self, config):
+        import asyncio
+        from ato.hyperopt.pruning import run_async_trial
+        self.scope.config = config
+        try:
+            metric, trial = await run_async_trial(
+                lambda: asyncio.wait_for(self.trial(*self.args, **self.kwargs), self.executor.timeout),
+                config,
+                self.pruner,
+                self.mode
+            )
+        except asyncio.TimeoutError:
+            config.__cancelled__ = True
+            return self.worst_metric
+        if self.pruner is not None:
+            self.pruner.add_trial(trial)
+        return metric
+
+
+class AsyncTrialExecutor:
+    def __init__(self, max_concurrency=None, timeout=None, rung_timeout=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.rung_timeout = rung_timeout
+
+    @contextmanager
+    def open(self, hyperopt, estimator, *args, **kwargs):
+        if not hyperopt.scope.is_applied:
+            hyperopt.scope.__enter__()
+        session = _AsyncTrialSession(self, hyperopt, estimator, args, kwargs)
+        try:
+            yield session
+        finally:
+            session.close()
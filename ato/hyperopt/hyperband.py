@@ -1,4 +1,5 @@
 import math
+import random
 from copy import deepcopy as dcp
 from itertools import chain
 
@@ -7,56 +8,176 @@ from ato.hyperopt.base import HyperOpt, DistributedMixIn, GridSpaceMixIn
 
 
 class HyperBand(HyperOpt, GridSpaceMixIn):
-    def __init__(self, scope, search_spaces, halving_rate, num_min_samples, tracker=None, mode='max'):
+    def __init__(
+        self,
+        scope,
+        search_spaces,
+        halving_rate,
+        num_min_samples,
+        tracker=None,
+        mode='max',
+        executor=None,
+        max_budget=None,
+        min_budget=1,
+        budget_key='__budget__',
+        seed=None,
+        space_options=None,
+        pruner=None,
+        checkpoint=None,
+        cache=None
+    ):
         if halving_rate <= 0 or halving_rate >= 1:
             raise ValueError(f'halving_rate must be greater than 0.0 but less than 1.0, but got {halving_rate}.')
         if num_min_samples < 1:
             raise ValueError(f'num_min_samples must be greater than or equal to 1, but got {num_min_samples}.')
-        super().__init__(scope, search_spaces, tracker, mode)
+        if max_budget is not None and not 0 < min_budget <= max_budget:
+            raise ValueError(f'min_budget must be in (0, max_budget], but got {min_budget} with max_budget {max_budget}.')
+        super().__init__(scope, search_spaces, tracker, mode, executor, pruner, checkpoint, cache)
         self.halving_rate = halving_rate
         self.num_min_samples = num_min_samples
-        self.distributions = self.prepare_distributions(self.config, self.search_spaces)
+        self.max_budget = max_budget
+        self.min_budget = min_budget
+        self.budget_key = budget_key
+        self.seed = seed
+        self.space_options = space_options or dict()
+        self.distributions = self.prepare_distributions(self.config, self.search_spaces, **self.space_options)
 
     @classmethod
-    def prepare_distributions(cls, base_config, search_spaces):
-        distributions = super().prepare_distributions(base_config, search_spaces)
-        for distribution in distributions:
-            distribution.__num_halved__ = 0
-        return distributions
+    def prepare_distributions(cls, base_config, search_spaces, **kwargs):
+        return super().prepare_distributions(base_config, search_spaces, __num_halved__=0, **kwargs)
+
+    def get_budget(self, config):
+        # without max_budget, estimators derive their training length from __num_halved__
+        if self.max_budget is None:
+            return config.__num_halved__
+        return config.get(self.budget_key)
 
     def main(self, func):
         def launch(*args, **kwargs):
-            logs = []
-            distributions = self.distributions
-            while len(distributions) >= self.num_min_samples:
-                results = self.estimate(func, distributions, *args, **kwargs)
-                results.sort(key=lambda item: item.__metric__, reverse=self.mode == 'max')
-                logs.append(results)
-                distributions = []
-                for config in results[:int(len(results)*self.halving_rate)]:
-                    config.__num_halved__ += 1
-                    distributions.append(config)
+            if self.max_budget is not None:
+                return self.run_brackets(func, *args, **kwargs)
+            # the search space is part of the state, so an unseeded sample is the same one after a resume
+            state = self.restore_checkpoint(ADict(
+                space=self.distributions,
+                logs=[],
+                distributions=self.distributions,
+                result=None
+            ))
+            self.distributions = state.space
+            if state.result is not None:
+                return state.result
+            with self.open_session(func, *args, **kwargs):
+                while len(state.distributions) >= self.num_min_samples:
+                    results = self.estimate(func, state.distributions, *args, **kwargs)
+                    results.sort(key=lambda item: item.__metric__, reverse=self.mode == 'max')
+                    distributions = []
+                    for config in results[:int(len(results)*self.halving_rate)]:
+                        config.__num_halved__ += 1
+                        distributions.append(config)
+                    self.update_state(extend=dict(logs=[results]), distributions=distributions)
+            logs = state.logs
             last_config = logs[-1][0]
-            metric = self.estimate_single_run(func, last_config, *args, **kwargs)
+            metric = self.estimate_cached_run(func, last_config, *args, **kwargs)
             best_config = dcp(last_config)
             best_config.__metric__ = metric
             logs.append([best_config])
-            return ADict(config=best_config, metric=metric, logs=logs)
+            state.result = ADict(config=best_config, metric=metric, logs=logs)
+            if self.cache is not None:
+                state.result.cache_hits = self.cache.stats.hits
+            self.save_checkpoint()
+            return state.result
         return launch
 
-    def estimate(self, estimator, distributions, *args, **kwargs):
-        results = []
-        for config in distributions:
-            config = dcp(config)
-            self.scope.config = config
-            metric = self.estimate_single_run(estimator, config, *args, **kwargs)
-            config.__metric__ = metric
-            results.append(config)
-        return results
+    def get_brackets(self):
+        # Li et al.: bracket s starts n configs at max_budget*rate^s and keeps the best rate-th at every rung
+        rate = self.halving_rate
+        num_brackets = int(math.log(self.min_budget/self.max_budget)/math.log(rate)+1e-9)+1
+        is_integer = isinstance(self.max_budget, int) and isinstance(self.min_budget, int)
+        brackets = []
+        for s in reversed(range(num_brackets)):
+            budgets = [self.max_budget*math.pow(rate, s-index) for index in range(s+1)]
+            if is_integer:
+                budgets = [max(round(budget), 1) for budget in budgets]
+            brackets.append(ADict(
+                num_configs=math.ceil(num_brackets/(s+1)/math.pow(rate, s)-1e-9),
+                budgets=budgets
+            ))
+        return brackets
 
-    def estimate_single_run(self, estimator, config, *args, **kwargs):
-        self.scope.config = config
-        return self.scope(estimator)(*args, **kwargs)
+    def run_brackets(self, func, *args, **kwargs):
+        rng = random.Random(self.seed)
+        state = self.restore_checkpoint(ADict(
+            space=self.distributions,
+            bracket_index=0,
+            rung_index=0,
+            distributions=None,
+            num_configs=0,
+            bracket_logs=[],
+            brackets=[],
+            logs=[],
+            total_budget=0,
+            best_config=None,
+            rng_state=rng.getstate(),
+            result=None
+        ))
+        self.distributions = state.space
+        if state.result is not None:
+            return state.result
+        rng.setstate(state.rng_state)
+        is_better = (lambda a, b: a > b) if self.mode == 'max' else (lambda a, b: a < b)
+        brackets = self.get_brackets()
+        with self.open_session(func, *args, **kwargs):
+            while state.bracket_index < len(brackets):
+                bracket = brackets[state.bracket_index]
+                if state.distributions is None:
+                    num_configs = min(bracket.num_configs, len(self.distributions))
+                    self.update_state(
+                        num_configs=num_configs,
+                        distributions=list(self.distributions.sample(num_configs, rng)),
+                        rng_state=rng.getstate()
+                    )
+                while state.rung_index < len(bracket.budgets):
+                    budget = bracket.budgets[state.rung_index]
+                    for config in state.distributions:
+                        config[self.budget_key] = budget
+                    results = self.estimate(func, state.distributions, *args, **kwargs)
+                    results.sort(key=lambda item: item.__metric__, reverse=self.mode == 'max')
+                    distributions = []
+                    for config in results[:max(int(len(results)*self.halving_rate), 1)]:
+                        config = dcp(config)
+                        config.__num_halved__ += 1
+                        distributions.append(config)
+                    self.update_state(
+                        extend=dict(bracket_logs=[results]),
+                        total_budget=state.total_budget+budget*len(results),
+                        distributions=distributions,
+                        rung_index=state.rung_index+1
+                    )
+                winner = state.bracket_logs[-1][0]
+                if state.best_config is not None and not is_better(winner.__metric__, state.best_config.__metric__):
+                    winner = state.best_config
+                self.update_state(
+                    extend=dict(
+                        logs=state.bracket_logs,
+                        brackets=[ADict(num_configs=state.num_configs, budgets=bracket.budgets, logs=state.bracket_logs)]
+                    ),
+                    best_config=winner,
+                    bracket_index=state.bracket_index+1,
+                    rung_index=0,
+                    distributions=None,
+                    bracket_logs=[]
+                )
+        state.result = ADict(
+            config=state.best_config,
+            metric=state.best_config.__metric__,
+            logs=state.logs,
+            brackets=state.brackets,
+            total_budget=state.total_budget
+        )
+        if self.cache is not None:
+            state.result.cache_hits = self.cache.stats.hits
+        self.save_checkpoint()
+        return state.result
 
     def num_generations(self):
         max_size = len(self.distributions)
@@ -0,0 +1,165 @@
+import math
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+_current_trial = ContextVar('ato_current_trial', default=None)
+
+
+class TrialPruned(Exception):
+    pass
+
+
+class Trial:
+    def __init__(self, pruner=None, mode='max'):
+        self.pruner = pruner
+        self.mode = mode
+        self.steps = []
+        self.values = []
+
+    def report(self, step, value):
+        self.steps.append(step)
+        self.values.append(float(value))
+
+    def should_prune(self):
+        return self.pruner is not None and bool(self.values) and self.pruner.should_prune(self)
+
+    def get_pruned_metric(self):
+        if self.values:
+            return self.values[-1]
+        return float('-inf') if self.mode == 'max' else float('inf')
+
+
+def current_trial():
+    # estimators run outside of an optimizer get a detached trial that never prunes
+    trial = _current_trial.get()
+    return Trial() if trial is None else trial
+
+
+@contextmanager
+def activate(trial):
+    token = _current_trial.set(trial)
+    try:
+        yield trial
+    finally:
+        _current_trial.reset(token)
+
+
+def reset_outcome(config):
+    # a promoted config starts a new trial, so whatever ended its previous one does not carry over
+    config.pop('__pruned__', None)
+    config.pop('__cancelled__', None)
+
+
+def run_trial(fn, config, pruner=None, mode='max'):
+    reset_outcome(config)
+    trial = Trial(pruner, mode)
+    with activate(trial):
+        try:
+            metric = fn()
+        except TrialPruned:
+            metric = trial.get_pruned_metric()
+            config['__pruned__'] = True
+    return metric, trial
+
+
+async def run_async_trial(coroutine_fn, config, pruner=None, mode='max'):
+    reset_outcome(config)
+    trial = Trial(pruner, mode)
+    with activate(trial):
+        try:
+            metric = await coroutine_fn()
+        except TrialPruned:
+            metric = trial.get_pruned_metric()
+            config['__pruned__'] = True
+    return metric, trial
+
+
+class ThresholdPruner:
+    # prunes a trial whose value at a step is worse than the threshold of that step
+    def __init__(self, thresholds=None, num_warmup_steps=0):
+        self.thresholds = dict() if thresholds is None else thresholds
+        self.num_warmup_steps = num_warmup_steps
+
+    def get_threshold(self, step, mode):
+        return self.thresholds.get(step)
+
+    def should_prune(self, trial):
+        step, value = trial.steps[-1], trial.values[-1]
+        if math.isnan(value):
+            return True
+        if step < self.num_warmup_steps:
+            return False
+        threshold = self.get_threshold(step, trial.mode)
+        if threshold is None:
+            return False
+        return value < threshold if trial.mode == 'max' else value > threshold
+
+
+class PercentilePruner(ThresholdPruner):
+    # finished curves live in one (trials, steps) float array, NaN where a trial did not report a step;
+    # it grows by doubling, so adding a curve is amortized O(steps)
+    def __init__(self, percentile, num_startup_trials=5, num_warmup_steps=0):
+        if not 0 < percentile < 100:
+            raise ValueError(f'percentile must be greater than 0 but less than 100, but got {percentile}.')
+        import numpy as np
+        super().__init__(num_warmup_steps=num_warmup_steps)
+        self.percentile = percentile
+        self.num_startup_trials = num_startup_trials
+        self.columns = dict()
+        self.num_curves = 0
+        self.buffer = np.empty((0, 0))
+        self.snapshot = None
+
+    @property
+    def curves(self):
+        return self.buffer[:self.num_curves, :len(self.columns)]
+
+    def add_curve(self, steps, values):
+        import numpy as np
+        if not steps:
+            return
+        new_steps = [step for step in dict.fromkeys(steps) if step not in self.columns]
+        for step in new_steps:
+            self.columns[step] = len(self.columns)
+        num_rows, num_columns = self.buffer.shape
+        if self.num_curves == num_rows or len(self.columns) > num_columns:
+            buffer = np.full((
+                max(num_rows*2, 8) if self.num_curves == num_rows else num_rows,
+                max(num_columns*2, len(self.columns), 8) if len(self.columns) > num_columns else num_columns
+            ), np.nan)
+            buffer[:num_rows, :num_columns] = self.buffer
+            self.buffer = buffer
+        self.buffer[self.num_curves, [self.columns[step] for step in steps]] = values
+        self.num_curves += 1
+        self.snapshot = None
+
+    def add_trial(self, trial):
+        self.add_curve(trial.steps, trial.values)
+
+    def get_threshold(self, step, mode):
+        import numpy as np
+        column = self.columns.get(step)
+        if column is None:
+            return None
+        peers = self.buffer[:self.num_curves, column]
+        peers = peers[~np.isnan(peers)]
+        if len(peers) < self.num_startup_trials:
+            return None
+        return float(np.percentile(peers, 100-self.percentile if mode == 'max' else self.percentile))
+
+    def get_snapshot(self, mode):
+        # what a worker process needs to prune: one threshold per step, recomputed only after a new curve
+        if self.snapshot is None or self.snapshot[0] != mode:
+            thresholds = dict()
+            for step in self.columns:
+                threshold = self.get_threshold(step, mode)
+                if threshold is not None:
+                    thresholds[step] = threshold
+            self.snapshot = (mode, ThresholdPruner(thresholds, self.num_warmup_steps))
+        return self.snapshot[1]
+
+
+class MedianPruner(PercentilePruner):
+    def __init__(self, num_startup_trials=5, num_warmup_steps=0):
+        super().__init__(50, num_startup_trials, num_warmup_steps)
@@ -0,0 +1,135 @@
+import math
+
+from ato.adict import ADict
+from ato.hyperopt.base import HyperOpt, SampledSpace, SampledSpaceMixIn
+
+
+class TPE(HyperOpt, SampledSpaceMixIn):
+    # independent Tree-structured Parzen Estimator over the unit cube of search_spaces
+    def __init__(
+        self,
+        scope,
+        search_spaces,
+        num_trials,
+        batch_size=1,
+        num_startup_trials=10,
+        num_candidates=64,
+        gamma=0.25,
+        tracker=None,
+        mode='max',
+        executor=None,
+        seed=None,
+        pruner=None,
+        cache=None
+    ):
+        if num_trials < 1:
+            raise ValueError(f'num_trials must be greater than or equal to 1, but got {num_trials}.')
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be greater than or equal to 1, but got {batch_size}.')
+        if gamma <= 0 or gamma >= 1:
+            raise ValueError(f'gamma must be greater than 0.0 but less than 1.0, but got {gamma}.')
+        super().__init__(scope, search_spaces, tracker, mode, executor, pruner, cache=cache)
+        import numpy as np
+        self.num_trials = num_trials
+        self.batch_size = batch_size
+        self.num_startup_trials = num_startup_trials
+        self.num_candidates = num_candidates
+        self.gamma = gamma
+        self.rng = np.random.default_rng(seed)
+        self.num_categories = [
+            len(search_space.categories) if search_space.get('param_type', '').upper() == 'CATEGORY' else 0
+            for search_space in search_spaces.values()
+        ]
+
+    def split(self, unit_samples, metrics):
+        import numpy as np
+        order = np.argsort(-metrics if self.mode == 'max' else metrics, kind='stable')
+        num_good = max(math.ceil(self.gamma*len(metrics)), 1)
+        return unit_samples[order[:num_good]], unit_samples[order[num_good:]]
+
+    @classmethod
+    def get_bandwidth(cls, centers):
+        # Scott's rule in one dimension, floored so that a tight cluster still explores its neighbourhood
+        if len(centers) < 2:
+            return 0.5
+        return max(1.06*float(centers.std())*len(centers)**-0.2, 0.05)
+
+    @classmethod
+    def get_log_density(cls, candidates, centers, num_categories):
+        import numpy as np
+        # a mixture of the observations and a uniform prior component, evaluated for all candidates at once
+        if num_categories:
+            counts = np.bincount((centers*num_categories).astype(np.int64), minlength=num_categories)
+            probabilities = (counts+1)/(len(centers)+num_categories)
+            return np.log(probabilities[np.minimum(candidates*num_categories, num_categories-1).astype(np.int64)])
+        if len(centers) == 0:
+            return np.zeros(len(candidates))
+        sigma = cls.get_bandwidth(centers)
+        scale = sigma*math.sqrt(2)
+        mass = np.array([0.5*(math.erf((1-center)/scale)-math.erf(-center/scale)) for center in centers.tolist()])
+        kernels = np.exp(-0.5*((candidates[:, None]-centers[None, :])/sigma)**2)/(sigma*math.sqrt(2*math.pi)*mass)
+        return np.log((kernels.sum(axis=1)+1)/(len(centers)+1))
+
+    def sample_candidates(self, centers, num_categories):
+        import numpy as np
+        num_candidates = self.num_candidates
+        if num_categories:
+            counts = np.bincount((centers*num_categories).astype(np.int64), minlength=num_categories)
+            probabilities = (counts+1)/(len(centers)+num_categories)
+            return (self.rng.choice(num_categories, size=num_candidates, p=probabilities)+0.5)/num_categories
+        # component len(centers) is the uniform prior
+        components = self.rng.integers(0, len(centers)+1, size=num_candidates)
+        candidates = self.rng.random(num_candidates)
+        from_kernel = components < len(centers)
+        if from_kernel.any():
+            sigma = self.get_bandwidth(centers)
+            means = centers[components[from_kernel]]
+            samples = means+sigma*self.rng.standard_normal(len(means))
+            outside = (samples < 0) | (samples >= 1)
+            while outside.any():
+                samples[outside] = means[outside]+sigma*self.rng.standard_normal(int(outside.sum()))
+                outside = (samples < 0) | (samples >= 1)
+            candidates[from_kernel] = samples
+        return candidates
+
+    def suggest(self, unit_samples, metrics, num_configs):
+        import numpy as np
+        num_dims = len(self.num_categories)
+        suggestions = []
+        # pending suggestions join the bad set (constant liar), which spreads a batch over different modes
+        for _ in range(num_configs):
+            if len(metrics)+len(suggestions) < self.num_startup_trials:
+                suggestions.append(self.rng.random(num_dims))
+                continue
+            good, bad = self.split(unit_samples, metrics)
+            if suggestions:
+                bad = np.concatenate([bad, np.stack(suggestions)])
+            candidates = np.empty((self.num_candidates, num_dims))
+            scores = np.zeros(self.num_candidates)
+            for dim, num_categories in enumerate(self.num_categories):
+                candidates[:, dim] = self.sample_candidates(good[:, dim], num_categories)
+                scores += self.get_log_density(candidates[:, dim], good[:, dim], num_categories)
+                scores -= self.get_log_density(candidates[:, dim], bad[:, dim], num_categories)
+            suggestions.append(candidates[int(np.argmax(scores))])
+        return np.stack(suggestions)
+
+    def main(self, func):
+        def launch(*args, **kwargs):
+            import numpy as np
+            unit_samples = np.zeros((0, len(self.num_categories)))
+            metrics = np.zeros(0)
+            logs = []
+            with self.open_session(func, *args, **kwargs):
+                while len(metrics) < self.num_trials:
+                    suggestions = self.suggest(unit_samples, metrics, min(self.batch_size, self.num_trials-len(metrics)))
+                    samples = self.convert_unit_samples(self.search_spaces, suggestions)
+                    results = self.estimate(func, list(SampledSpace(self.config, samples)), *args, **kwargs)
+                    unit_samples = np.concatenate([unit_samples, suggestions])
+                    metrics = np.concatenate([metrics, [float(config.__metric__) for config in results]])
+                    logs.append(sorted(results, key=lambda item: item.__metric__, reverse=self.mode == 'max'))
+            best_config = sorted((log[0] for log in logs), key=lambda item: item.__metric__, reverse=self.mode == 'max')[0]
+            result = ADict(config=best_config, metric=best_config.__metric__, logs=logs)
+            if self.cache is not None:
+                result.cache_hits = self.cache.stats.hits
+            return result
+        return launch
@@ -1,103 +1,266 @@
-def parse_command(command):
-    tokens = []
-    i = 0
+import hashlib
+import os
+import re
+from collections import OrderedDict, namedtuple
+
+
+_BRACKETS = {'[': ']', '{': '}', '(': ')'}
+_SPACE = re.compile(r'\s*')
+_TOKEN = re.compile(r'([^\s=]*)(=([^\s%\[{(]\S*)?)?\s*')
+_PLAIN_VALUE = re.compile(r'\S*')
+# %...% with \-escapes and %% pairs; an unterminated string runs to the end of the command
+_BACKTICK_STRING = re.compile(r'%(?:[^%\\]+|\\.|%%|\\\Z)*%?', re.S)
+# everything up to the next bracket, skipping %...% strings and \-escapes as a whole
+_BRACKET_CONTENT = re.compile(r'(?:[^%\\\[\]{}()]+|%(?:[^%\\]+|\\.|%%|\\\Z)*%?|\\.|\\\Z)*', re.S)
+
+
+class _LRUCache(OrderedDict):
+    # drops the least recently used entry once it holds more than maxsize
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+# (realpath, size, mtime_ns) -> sha256 of the content, and sha256 -> tokens; a launcher may pass any number of @files
+_file_digests = _LRUCache(256)
+_file_tokens = _LRUCache(256)
+
+
+class Token(namedtuple('Token', ['key', 'value', 'start', 'end'])):
+    # value is None for bare tokens (views), otherwise the verbatim text after '='
+    __slots__ = ()
+
+    @property
+    def text(self):
+        return self.key if self.value is None else f'{self.key}={self.value}'
+
+
+def _scan_backtick_string(command, i):
+    return _BACKTICK_STRING.match(command, i).end()
+
+
+def _scan_bracketed_value(command, i):
+    stack = [_BRACKETS[command[i]]]
+    i += 1
     length = len(command)
-    while i < length:
-        while i < length and command[i].isspace():
-            i += 1
+    match = _BRACKET_CONTENT.match
+    while True:
+        i = match(command, i).end()
         if i >= length:
-            break
+            return length
+        c = command[i]
+        i += 1
+        if c in _BRACKETS:
+            stack.append(_BRACKETS[c])
+        elif c == stack[-1]:
+            stack.pop()
+            if not stack:
+                return i
+
+
+def _scan_value(command, i):
+    if i < len(command):
+        c = command[i]
+        if c == '%':
+            return _scan_backtick_string(command, i)
+        elif c in _BRACKETS:
+            return _scan_bracketed_value(command, i)
+        return _PLAIN_VALUE.match(command, i).end()
+    return i
+
+
+def tokenize(command):
+    length = len(command)
+    i = _SPACE.match(command).end()
+    match = _TOKEN.match
+    while i < length:
         start = i
-        while i < length and not command[i].isspace() and command[i] != '=':
-            i += 1
-        if i < length and command[i] == '=':
-            key = command[start:i]
-            i += 1
-            if i < length:
-                value, i = parse_value(command, i)
-            else:
-                value = ''
-            tokens.append(f'{key}={value}')
+        token = match(command, i)
+        if token.group(2) is None:
+            yield Token(token.group(1), None, start, token.end(1))
+            i = token.end()
+        elif token.group(3) is None:
+            i = _scan_value(command, token.end(2))
+            yield Token(token.group(1), command[token.end(2):i], start, i)
+            i = _SPACE.match(command, i).end()
         else:
-            token_start = start
-            while i < length and not command[i].isspace():
+            yield Token(token.group(1), token.group(3), start, token.end(3))
+            i = token.end()
+
+
+_KEY_RUN = re.compile(r'[^\s=]*')
+_STRING_RUN = re.compile(r'[^%\\]*')
+_BRACKET_RUN = re.compile(r'[^%\\\[\]{}()]*')
+_WHITESPACE = re.compile(r'\s')
+
+
+class _TokenBoundaries:
+    # resumable version of tokenize() that only finds where tokens end, so every chunk is scanned once
+    def __init__(self):
+        self.state = 'space'
+        self.start = None
+        self.end = None
+        self.stack = []
+        self.resume = None
+
+    def finish(self, end):
+        span = (self.start, end)
+        self.state = 'space'
+        self.start = self.end = None
+        return span
+
+    def feed(self, chunk, offset):
+        i = 0
+        length = len(chunk)
+        while i < length:
+            state = self.state
+            if state == 'space':
+                i = _SPACE.match(chunk, i).end()
+                if i < length:
+                    self.start = offset+i
+                    self.state = 'key'
+            elif state == 'key':
+                i = _KEY_RUN.match(chunk, i).end()
+                if i < length:
+                    if chunk[i] == '=':
+                        i += 1
+                        self.state = 'value'
+                    else:
+                        yield self.finish(offset+i)
+            elif state == 'value':
+                c = chunk[i]
+                if c == '%':
+                    i += 1
+                    self.state = 'string'
+                elif c in _BRACKETS:
+                    i += 1
+                    self.stack = [_BRACKETS[c]]
+                    self.state = 'bracket'
+                elif _WHITESPACE.match(c):
+                    yield self.finish(offset+i)
+                else:
+                    self.state = 'plain'
+            elif state == 'plain':
+                i = _PLAIN_VALUE.match(chunk, i).end()
+                if i < length:
+                    yield self.finish(offset+i)
+            elif state == 'string':
+                i = _STRING_RUN.match(chunk, i).end()
+                if i < length:
+                    if chunk[i] == '\\':
+                        self.resume = 'string'
+                        self.state = 'escape'
+                    else:
+                        self.state = 'percent'
+                    i += 1
+            elif state == 'escape':
                 i += 1
-            tokens.append(command[token_start:i])
+                self.state = self.resume
+            elif state == 'percent':
+                # %% is an escaped percent sign, any other character closes the string
+                if chunk[i] == '%':
+                    i += 1
+                    self.state = 'string'
+                elif self.stack:
+                    self.state = 'bracket'
+                else:
+                    yield self.finish(offset+i)
+            elif state == 'bracket':
+                i = _BRACKET_RUN.match(chunk, i).end()
+                if i < length:
+                    c = chunk[i]
+                    i += 1
+                    if c == '\\':
+                        self.resume = 'bracket'
+                        self.state = 'escape'
+                    elif c == '%':
+                        self.state = 'string'
+                    elif c in _BRACKETS:
+                        self.stack.append(_BRACKETS[c])
+                    elif c == self.stack[-1]:
+                        self.stack.pop()
+                        if not self.stack:
+                            self.end = offset+i
+                            self.state = 'closed'
+            else:
+                # the value is closed, but a token touching the end of the input may still grow
+                yield self.finish(self.end)
+
+
+def _shift_tokens(tokens, offset):
+    for token in tokens:
+        yield token._replace(start=token.start+offset, end=token.end+offset)
+
+
+def iter_tokens(chunks):
+    # only the unfinished token is kept between chunks, and its pieces are joined once it completes
+    boundaries = _TokenBoundaries()
+    pieces = []
+    offset = 0
+    for chunk in chunks:
+        for start, end in boundaries.feed(chunk, offset):
+            if start >= offset:
+                text = chunk[start-offset:end-offset]
+            else:
+                text = (''.join(pieces)+chunk[:max(end-offset, 0)])[:end-start]
+            yield from _shift_tokens(tokenize(text), start)
+        start = boundaries.start
+        if start is None:
+            pieces = []
+        elif start >= offset:
+            pieces = [chunk[start-offset:]]
+        else:
+            pieces.append(chunk)
+        offset += len(chunk)
+    if boundaries.start is not None:
+        yield from _shift_tokens(tokenize(''.join(pieces)), boundaries.start)
+
+
+def tokenize_file(path):
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    tokens = _file_tokens.get(_file_digests.get(key))
+    if tokens is None:
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = _file_digests[key] = hashlib.sha256(content).hexdigest()
+        tokens = _file_tokens.get(digest)
+        if tokens is None:
+            tokens = _file_tokens[digest] = tuple(tokenize(content.decode('utf-8')))
     return tokens
 
 
+def is_argument_source(token):
+    return token.value is None and (token.key == '-' or len(token.key) > 1 and token.key.startswith('@'))
+
+
+def parse_command(command):
+    return [token.text for token in tokenize(command)]
+
+
 def parse_value(command, i):
-    if i < len(command):
-        if command[i] == '%':
-            return parse_backtick_string(command, i)
-        elif command[i] in ['[', '(', '{']:
-            return parse_bracketed_value(command, i)
-        else:
-            start = i
-            while i < len(command) and not command[i].isspace():
-                i += 1
-            return command[start:i], i
-    return '', i
+    end = _scan_value(command, i)
+    return command[i:end], end
 
 
 def parse_backtick_string(command, i):
     assert command[i] == '%'
-    i += 1
-    value = ['%']
-    length = len(command)
-    nesting_level = 1
-    while i < length:
-        c = command[i]
-        if c == '\\' and i+1 < length:
-            value.append(c)
-            value.append(command[i+1])
-            i += 2
-        elif c == '%':
-            value.append(c)
-            i += 1
-            if i < length and command[i] == '%':
-                value.append(command[i])
-                i += 1
-            else:
-                nesting_level -= 1
-                if nesting_level == 0:
-                    break
-        elif c == '%':
-            value.append(c)
-            nesting_level += 1
-            i += 1
-        else:
-            value.append(c)
-            i += 1
-    return ''.join(value), i
+    end = _scan_backtick_string(command, i)
+    return command[i:end], end
 
 
 def parse_bracketed_value(command, i):
-    brackets = {'[': ']', '{': '}', '(': ')'}
-    opening_bracket = command[i]
-    closing_bracket = brackets[opening_bracket]
-    value = [opening_bracket]
-    i += 1
-    length = len(command)
-    stack = [closing_bracket]
-    while i < length and stack:
-        c = command[i]
-        if c == '%':
-            backtick_value, i = parse_backtick_string(command, i)
-            value.append(backtick_value)
-        elif c == '\\' and i+1 < length:
-            value.append(c)
-            value.append(command[i+1])
-            i += 2
-        elif c in brackets:
-            stack.append(brackets[c])
-            value.append(c)
-            i += 1
-        elif c == stack[-1]:
-            stack.pop()
-            value.append(c)
-            i += 1
-        else:
-            value.append(c)
-            i += 1
-    return ''.join(value), i
+    end = _scan_bracketed_value(command, i)
+    return command[i:end], end
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+import tracemalloc
+from collections.abc import Mapping
+
+from ato.adict import ADict
+
+
+_MISSING = object()
+
+
+def _flatten(config, prefix=''):
+    flattened = dict()
+    for key, value in config.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, Mapping) and value:
+            flattened.update(_flatten(value, prefix=f'{name}.'))
+        else:
+            flattened[name] = value
+    return flattened
+
+
+def _is_same(before, after):
+    if before is after:
+        return True
+    try:
+        return bool(before == after)
+    except Exception:
+        return False
+
+
+def _get_changed_keys(before, after):
+    keys = set(before) | set(after)
+    return sorted(
+        key for key in keys
+        if not _is_same(before.get(key, _MISSING), after.get(key, _MISSING))
+    )
+
+
+class ScopeProfiler:
+    def __init__(self, scope, trace_memory=True):
+        self.scope = scope
+        self.trace_memory = trace_memory
+        self.records = []
+        self._origin = time.perf_counter_ns()
+        self._started_tracing = False
+
+    def __enter__(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        # shadowing the bound methods keeps apply() free of any profiling branch
+        vars(self.scope).update(
+            _run_view=self._profile_view,
+            _run_literal=self._profile_literal,
+            _run_compute_view=self._profile_compute_view
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        for name in ('_run_view', '_run_literal', '_run_compute_view'):
+            vars(self.scope).pop(name, None)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _profile_view(self, field):
+        phase = 'lazy_views' if self.scope.views[field].lazy else 'views'
+        return self._measure(phase, field, type(self.scope)._run_view, field)
+
+    def _profile_literal(self, literal):
+        name = literal if isinstance(literal, str) else repr(literal)
+        return self._measure('literals', name, type(self.scope)._run_literal, literal)
+
+    def _profile_compute_view(self, field):
+        return self._measure('compute', field, type(self.scope)._run_compute_view, field)
+
+    def _measure(self, phase, name, method, argument):
+        before = _flatten(self.scope.config)
+        memory_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        start = time.perf_counter_ns()
+        try:
+            return method(self.scope, argument)
+        finally:
+            end = time.perf_counter_ns()
+            memory_after = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+            self.records.append(
+                ADict(
+                    phase=phase,
+                    name=name,
+                    start=(start-self._origin)/1e3,
+                    duration=(end-start)/1e3,
+                    memory_delta=memory_after-memory_before,
+                    changed_keys=_get_changed_keys(before, _flatten(self.scope.config)),
+                    thread_id=threading.get_ident()
+                )
+            )
+
+    def export_chrome_trace(self, path):
+        import json
+        events = [
+            dict(
+                name=record.name,
+                cat=record.phase,
+                ph='X',
+                ts=record.start,
+                dur=record.duration,
+                pid=os.getpid(),
+                tid=record.thread_id,
+                args=dict(memory_delta=record.memory_delta, changed_keys=record.changed_keys)
+            )
+            for record in self.records
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(traceEvents=events, displayTimeUnit='ms'), f)
+
+    def summary(self):
+        records = sorted(self.records, key=lambda record: record.duration, reverse=True)
+        name_width = max([len('name')]+[len(record.name) for record in records])
+        lines = [f'{"phase":<10}  {"name":<{name_width}}  {"time (ms)":>10}  {"memory (KiB)":>12}  changed keys']
+        lines.append('-'*len(lines[0]))
+        for record in records:
+            lines.append(
+                f'{record.phase:<10}  {record.name:<{name_width}}  {record.duration/1e3:>10.3f}  '
+                f'{record.memory_delta/1024:>12.1f}  {", ".join(record.changed_keys)}'
+            )
+        total = sum(record.duration for record in records)/1e3
+        lines.append(f'{len(records)} steps, {total:.3f} ms in total')
+        return '\n'.join(lines)
@@ -1,20 +1,18 @@
-import argparse
-import ast
 import hashlib
-import inspect
-import pickle
+import os
 import sys
-import textwrap
-import uuid
+import time
+import types
 import warnings
+import weakref
 from contextlib import contextmanager
-from functools import wraps
+from contextvars import ContextVar, copy_context
+from functools import lru_cache, wraps
 
+from ato import xyz
 from ato.adict import ADict
-from inspect import currentframe, getframeinfo
 
-from ato.parser import parse_command
-from ato.trace import Canon
+from ato.parser import is_argument_source, iter_tokens, tokenize, tokenize_file
 
 
 # safe compile
@@ -22,23 +20,30 @@ def exec_with_no_permissions(code, __locals):
     exec(compile(code, '<string>', 'single'), {'__builtins__': None}, __locals)
 
 
+def _iter_argument_tokens(arguments):
+    for token in tokenize(' '.join(arguments)):
+        if not is_argument_source(token):
+            yield token
+        elif token.key == '-':
+            yield from iter_tokens(sys.stdin)
+        else:
+            yield from tokenize_file(token.key[1:])
+
+
 def parse_args_pythonic():
     if Scope.stored_arguments is not None:
         _pythonic_vars = Scope.stored_arguments
     else:
         _pythonic_vars = sys.argv[1:]
-    joined = ' '.join(_pythonic_vars)
-    _pythonic_vars = parse_command(joined)
     pythonic_vars = []
-    for literal in _pythonic_vars:
-        if '=' not in literal:
-            pythonic_vars.extend(literal.split())
+    for token in _iter_argument_tokens(_pythonic_vars):
+        if token.value is None:
+            pythonic_vars.append(token.key)
         else:
-            name, *values = literal.split('=')
-            value = '='.join(values)
+            value = token.value
             if value.startswith('%') and value.endswith('%'):
                 value = f'"{value[1:-1]}"'.replace('%', '\"')
-            pythonic_vars.append(f'{name}={value}')
+            pythonic_vars.append(f'{token.key}={value}')
     default_prefix = ''
     if len(Scope.registry) == 1:
         scope_name = list(Scope.registry.keys())[0]
@@ -165,24 +170,35 @@ def patch_parsing_method(func, unknown_external_literals='error'):
 
 
 def release():
+    _parser = _get_parser()
     if hasattr(_parser, 'stored_methods'):
         _parser.parse_args, _parser.parse_known_args = _parser.stored_methods
         del _parser.stored_methods
 
 
-_parser = argparse.ArgumentParser
+def _get_parser():
+    import argparse
+    return argparse.ArgumentParser
 
 
 def _print_config(config):
-    print(config.to_xyz())
+    sys.stdout.writelines(xyz.iter_dumps(config.to_dict()))
+    print()
     sys.exit(0)
 
 
+@lru_cache(maxsize=None)
+def _get_full_arguments(func):
+    import inspect
+    return inspect.getfullargspec(func)[0]
+
+
 def _get_func_trace_id(func):
     return f'{func.__module__}.{func.__qualname__}'
 
 
 def _fine_line_numbers(frame_info, filename, line):
+    import ast
     with open(filename, 'r', encoding='utf-8') as f:
         src = f.read()
     tree = ast.parse(src, filename=filename)
@@ -204,24 +220,285 @@ def _fine_line_numbers(frame_info, filename, line):
     return target_start_line, target_end_line
 
 
-def _generate_func_fingerprint(func, trace_id=None):
-    src = inspect.getsource(func)
+def _get_canonical_hash(obj):
+    import ast
+    import inspect
+    import textwrap
+    from ato.trace import Canon
+    src = inspect.getsource(obj)
     src = textwrap.dedent(src)
     tree = ast.parse(src)
     tree = Canon().visit(tree)
     ast.fix_missing_locations(tree)
     canonical = ast.dump(tree, annotate_fields=True, include_attributes=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest(), tree
+
+
+def _generate_func_fingerprint(func, trace_id=None, transitive=False):
     trace_id = _get_func_trace_id(func) if trace_id is None else trace_id
-    code_hash = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    if transitive:
+        code_hash = _get_transitive_hash(func)
+    else:
+        code_hash = _get_canonical_hash(func)[0]
     return ADict(**{trace_id: code_hash})
 
 
-class Scope:
-    registry = ADict()
-    parsed = False
-    stored_arguments = None
+# source digest and statically referenced names of every hashed function or class, computed once per process
+_code_references = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=None)
+def _get_library_paths():
+    import sysconfig
+    return tuple(
+        os.path.realpath(path)
+        for path in {sysconfig.get_path(name) for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')}
+        if path
+    )
+
+
+def _is_user_defined(obj):
+    import inspect
+    if not isinstance(obj, (types.FunctionType, type)):
+        return False
+    try:
+        file_name = inspect.getsourcefile(obj)
+    except TypeError:
+        return False
+    if file_name is None:
+        return False
+    return not os.path.realpath(file_name).startswith(_get_library_paths())
+
+
+def _find_references(tree):
+    import ast
+    local_names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            local_names.add(node.id)
+        elif isinstance(node, ast.arg):
+            local_names.add(node.arg)
+    references = dict()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            if node.value.id not in local_names:
+                references[f'{node.value.id}.{node.attr}'] = (node.value.id, node.attr)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in local_names:
+            references[node.id] = (node.id, None)
+    return tuple((name, *references[name]) for name in sorted(references))
+
+
+def _get_code_references(obj):
+    entry = _code_references.get(obj)
+    if entry is None:
+        code_hash, tree = _get_canonical_hash(obj)
+        entry = _code_references[obj] = (code_hash, _find_references(tree))
+    return entry
+
+
+def _resolve_references(obj, references):
+    # names are looked up on every call, so rebinding a module global is reflected in the next digest
+    import inspect
+    if isinstance(obj, type):
+        module = sys.modules.get(obj.__module__)
+        namespace = vars(module) if module is not None else {}
+    else:
+        namespace = obj.__globals__
+    callees = []
+    for name, base, attr in references:
+        if base not in namespace:
+            continue
+        callee = namespace[base]
+        if attr is not None:
+            if not isinstance(callee, types.ModuleType):
+                continue
+            callee = getattr(callee, attr, None)
+        if isinstance(callee, types.FunctionType):
+            callee = inspect.unwrap(callee)
+        if callee is not obj and _is_user_defined(callee):
+            callees.append((name, callee))
+    return callees
+
+
+def _get_transitive_hash(obj):
+    # Merkle digest over the call graph; each strongly connected component is hashed as a whole in a canonical
+    # order, so mutually recursive functions get the same digests whichever of them is hashed first
+    import inspect
+    obj = inspect.unwrap(obj) if isinstance(obj, types.FunctionType) else obj
+    indices = dict()
+    low_links = dict()
+    edges = dict()
+    digests = dict()
+    stack = []
+
+    def visit(node):
+        key = id(node)
+        indices[key] = low_links[key] = len(indices)
+        stack.append(node)
+        code_hash, references = _get_code_references(node)
+        edges[key] = []
+        for name, callee in _resolve_references(node, references):
+            try:
+                _get_code_references(callee)
+            except (OSError, TypeError):
+                continue
+            edges[key].append((name, callee))
+            if id(callee) not in indices:
+                visit(callee)
+                low_links[key] = min(low_links[key], low_links[id(callee)])
+            elif id(callee) not in digests:
+                low_links[key] = min(low_links[key], indices[id(callee)])
+        if low_links[key] != indices[key]:
+            return
+        component = []
+        while not component or component[-1] is not node:
+            component.append(stack.pop())
+        if len(component) == 1:
+            merkle = hashlib.sha256(code_hash.encode('utf-8'))
+            for name, callee in edges[key]:
+                merkle.update(f'[{name}:{digests[id(callee)]}]'.encode('utf-8'))
+            digests[key] = merkle.hexdigest()
+            return
+        members = {id(member) for member in component}
+        entries = []
+        for member in component:
+            links = ''.join(
+                f'[{name}:@{_get_func_trace_id(callee)}]' if id(callee) in members else f'[{name}:{digests[id(callee)]}]'
+                for name, callee in edges[id(member)]
+            )
+            entries.append(f'{_get_func_trace_id(member)}:{_get_code_references(member)[0]}{links}')
+        component_hash = hashlib.sha256('|'.join(sorted(entries)).encode('utf-8')).hexdigest()
+        for member in component:
+            member_id = f'{component_hash}:{_get_func_trace_id(member)}:{_get_code_references(member)[0]}'
+            digests[id(member)] = hashlib.sha256(member_id.encode('utf-8')).hexdigest()
+
+    visit(obj)
+    return digests[id(obj)]
+
+
+def _inject_config(func, name, index, num_arguments, config, args, kwargs):
+    # index and num_arguments come from the signature, analyzed once when func is decorated
+    if name in kwargs:
+        raise TypeError(f'{func.__name__}() got config "{name}" as a keyword argument, which is injected by scope.')
+    if index is not None and (index+1 < len(args) or num_arguments > len(args)):
+        args = list(args)
+        args.insert(index, config)
+    else:
+        kwargs[name] = config
+    return args, kwargs
+
+
+class _ScopeState:
+    # set once the first isolated context is created; until then scope attributes are read straight from the instance
+    enabled = False
+    # the scope applied last outside of isolated contexts, seen by every thread that has not set its own
     current_scope = None
+
+    def __init__(self, registry=None, parsed=False, stored_arguments=None, parent=None):
+        self.registry = ADict() if registry is None else registry
+        self.parsed = parsed
+        self.stored_arguments = stored_arguments
+        self.parent = parent
+        self.scopes = dict()
+
+    @property
+    def isolated(self):
+        return self.parent is not None
+
+    def get_locals(self, scope):
+        if self.parent is None:
+            return vars(scope)
+        local = self.scopes.get(scope)
+        if local is None:
+            source = self.parent.get_locals(scope)
+            local = self.scopes[scope] = dict(
+                config=source['config'].clone(),
+                screen=source['screen'].clone(),
+                compute=source['compute'],
+                mode=source['mode'],
+                is_applied=source['is_applied'],
+                views=ADict(source['views'])
+            )
+        return local
+
+
+_scope_state = ContextVar('ato_scope_state', default=_ScopeState())
+_current_scope = ContextVar('ato_current_scope')
+
+
+class _PrefixNode:
+    __slots__ = ('step', 'children', 'count', 'snapshot')
+
+    def __init__(self, step=None):
+        self.step = step
+        self.children = dict()
+        self.count = 0
+        self.snapshot = None
+
+
+class _ScopeMeta(type):
+    @property
+    def registry(cls):
+        return _scope_state.get().registry
+
+    @registry.setter
+    def registry(cls, registry):
+        _scope_state.get().registry = registry
+
+    @property
+    def parsed(cls):
+        return _scope_state.get().parsed
+
+    @parsed.setter
+    def parsed(cls, parsed):
+        _scope_state.get().parsed = parsed
+
+    @property
+    def stored_arguments(cls):
+        return _scope_state.get().stored_arguments
+
+    @stored_arguments.setter
+    def stored_arguments(cls, stored_arguments):
+        _scope_state.get().stored_arguments = stored_arguments
+
+    @property
+    def current_scope(cls):
+        return _current_scope.get(_ScopeState.current_scope)
+
+    @current_scope.setter
+    def current_scope(cls, scope):
+        _current_scope.set(scope)
+        if not _scope_state.get().isolated:
+            _ScopeState.current_scope = scope
+
+
+# attribute of a scope which is private to each isolated context
+class _ContextLocal:
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, scope, owner=None):
+        if scope is None:
+            return self
+        if not _ScopeState.enabled:
+            return scope.__dict__[self.name]
+        return _scope_state.get().get_locals(scope)[self.name]
+
+    def __set__(self, scope, value):
+        if not _ScopeState.enabled:
+            scope.__dict__[self.name] = value
+        else:
+            _scope_state.get().get_locals(scope)[self.name] = value
+
+
+class Scope(metaclass=_ScopeMeta):
     unknown_external_literals = 'ignore'
+    config = _ContextLocal()
+    screen = _ContextLocal()
+    compute = _ContextLocal()
+    mode = _ContextLocal()
+    is_applied = _ContextLocal()
+    views = _ContextLocal()
 
     def __init__(
         self,
@@ -229,23 +506,30 @@ class Scope:
         name='config',
         use_external_parser=False,
         external_priority=-2,
-        enable_override=False
+        enable_override=False,
+        cache_dir=None
     ):
-        self.config = ADict() if config is None else config
+        vars(self).update(
+            config=ADict() if config is None else config,
+            screen=ADict(views=[], literals=[], lazy_views=[]),
+            compute=False,
+            mode='ON',
+            is_applied=False,
+            views=ADict()
+        )
         self.name = name
         self.use_external_parser = use_external_parser
         self.enable_override = enable_override
         self.register()
-        self.views = ADict()
         self.manuals = ADict()
         self.observe('_default', config, priority=-1, lazy=False)
         add_func_to_scope(self, 'print', priority=1280, lazy=True, default=False)(_print_config)
-        self.screen = ADict(views=[], literals=[], lazy_views=[])
         self.external_priority = external_priority
-        self.compute = False
         self.config_in_compute = None
-        self.mode = 'ON'
-        self.is_applied = False
+        self.resolution_cache = None
+        if cache_dir is not None:
+            from ato.cache import ResolvedConfigCache
+            self.resolution_cache = ResolvedConfigCache(cache_dir)
         self._traced_data = ADict(fingerprints=ADict())
 
     def activate(self):
@@ -260,15 +544,25 @@ class Scope:
         yield
         self.activate()
 
-    def trace(self, trace_id=None):
+    @contextmanager
+    def profile(self, trace_memory=True):
+        from ato.profiler import ScopeProfiler
+        with ScopeProfiler(self, trace_memory=trace_memory) as profiler:
+            yield profiler
+
+    def trace(self, trace_id=None, transitive=False):
         def decorator(func):
-            self._traced_data.fingerprints.update(_generate_func_fingerprint(func, trace_id=trace_id))
+            self._traced_data.fingerprints.update(
+                _generate_func_fingerprint(func, trace_id=trace_id, transitive=transitive)
+            )
             return func
 
         return decorator
 
     def runtime_trace(self, init_fn=None, inspect_fn=None, trace_id=None):
         def decorator(func):
+            import pickle
+
             def inner(*args, **kwargs):
                 nonlocal trace_id
                 if init_fn is not None:
@@ -286,7 +580,8 @@ class Scope:
 
     def register(self):
         registry = self.__class__.registry
-        if len(registry) == 0:
+        if len(registry) == 0 and not _scope_state.get().isolated:
+            _parser = _get_parser()
             _parser.stored_methods = [_parser.parse_args, _parser.parse_known_args]
             _parser.parse_args = _parser.parse_known_args = patch_parsing_method(
                 _parser.parse_known_args,
@@ -307,6 +602,25 @@ class Scope:
     def override(cls, scope):
         cls.registry[scope.name] = scope
 
+    @classmethod
+    @contextmanager
+    def isolated(cls, arguments=None):
+        _ScopeState.enabled = True
+        outer_state = _scope_state.get()
+        state = _ScopeState(ADict(outer_state.registry), parent=outer_state)
+        if arguments is None:
+            state.parsed = outer_state.parsed
+            state.stored_arguments = outer_state.stored_arguments
+        else:
+            state.stored_arguments = list(arguments)
+        state_token = _scope_state.set(state)
+        scope_token = _current_scope.set(None)
+        try:
+            yield
+        finally:
+            _current_scope.reset(scope_token)
+            _scope_state.reset(state_token)
+
     def add_to_screen(self, field=None, config=None, priority=0, lazy=False, default=False, chain_with=None):
         if config is not None:
             add_config_to_scope(self, field, config, priority, lazy, default, chain_with)
@@ -341,7 +655,8 @@ class Scope:
                 manuals = manuals.clone()
                 for key, value in scope.manuals.items():
                     manuals[f'{scope.name}.{key}'] = manuals.pop(key)
-            print(manuals.to_xyz())
+            sys.stdout.writelines(xyz.iter_dumps(manuals.to_dict()))
+            print()
         print('-'*50)
         sys.exit(0)
 
@@ -375,6 +690,38 @@ class Scope:
             else:
                 self.screen.literals.append(literal)
 
+    def _run_view(self, field):
+        view = self.views[field]
+        if view.view_type == 'config':
+            self.config.update(view.config)
+        else:
+            view.fn(self.config)
+
+    def _run_literal(self, literal):
+        if isinstance(literal, str):
+            exec_with_no_permissions(f'config.{literal}', __locals={'config': self.config})
+        else:
+            self.config.update(literal)
+
+    def _run_compute_view(self, field):
+        view = self.views[field]
+        if view.view_type != 'config':
+            view.fn(self.config)
+
+    def _sort_screen(self):
+        self.screen.views.sort(key=lambda x: self.views[x].priority)
+        self.screen.lazy_views.sort(key=lambda x: self.views[x].priority)
+
+    def _compute_and_apply_lazy_views(self):
+        self.compute = True
+        self.config.freeze()
+        for field in self.screen.views:
+            self._run_compute_view(field)
+        self.compute = False
+        self.config.defrost()
+        for field in self.screen.lazy_views:
+            self._run_view(field)
+
     def apply(self):
         if len(sys.argv) >= 2:
             if sys.argv[1] in ('--help', '-h'):
@@ -382,34 +729,114 @@ class Scope:
             if sys.argv[1] in ('--help', '-h', 'manual'):
                 Scope.logging_manual()
         self.__class__.current_scope = self
-        self.screen.views.sort(key=lambda x: self.views[x].priority)
-        self.screen.lazy_views.sort(key=lambda x: self.views[x].priority)
+        self._sort_screen()
+        manifest = None
+        if self.resolution_cache is not None:
+            manifest = self._get_resolution_manifest()
+            cached_config = None if manifest is None else self.resolution_cache.get(manifest)
+            if cached_config is not None:
+                for key in [key for key in self.config if key not in cached_config]:
+                    del self.config[key]
+                self.config.update(cached_config)
+                self.is_applied = True
+                return
         for field in self.screen.views:
-            view = self.views[field]
-            if view.view_type == 'config':
-                self.config.update(view.config)
-            else:
-                view.fn(self.config)
+            self._run_view(field)
         for literal in self.screen.literals:
-            if isinstance(literal, str):
-                exec_with_no_permissions(f'config.{literal}', __locals={'config': self.config})
-            else:
-                self.config.update(literal)
-        self.compute = True
-        self.config.freeze()
-        for field in self.screen.views:
-            view = self.views[field]
-            if view.view_type != 'config':
-                view.fn(self.config)
-        self.compute = False
-        self.config.defrost()
-        for field in self.screen.lazy_views:
-            view = self.views[field]
-            if view.view_type == 'config':
-                self.config.update(view.config)
-            else:
-                view.fn(self.config)
+            self._run_literal(literal)
+        self._compute_and_apply_lazy_views()
         self.is_applied = True
+        if manifest is not None:
+            import pickle
+            try:
+                self.resolution_cache.put(manifest, self.config)
+            except (pickle.PicklingError, TypeError, AttributeError) as e:
+                warnings.warn(f'Resolved config of scope "{self.name}" cannot be cached: {e}')
+
+    def _get_resolution_manifest(self):
+        import inspect
+        import pickle
+        try:
+            views = []
+            for field in self.screen.views+self.screen.lazy_views:
+                view = self.views[field]
+                if view.view_type == 'config':
+                    config = view.config.to_dict() if isinstance(view.config, ADict) else view.config
+                    views.append((field, 'config', hashlib.sha256(pickle.dumps(config)).hexdigest()))
+                else:
+                    source_file = inspect.getsourcefile(inspect.unwrap(view.fn))
+                    views.append((field, _get_transitive_hash(view.fn), os.stat(source_file).st_mtime_ns))
+            literals = [
+                literal if isinstance(literal, str) else hashlib.sha256(pickle.dumps(literal)).hexdigest()
+                for literal in self.screen.literals
+            ]
+            base_config = hashlib.sha256(pickle.dumps(self.config.to_dict())).hexdigest()
+        except (OSError, TypeError, pickle.PicklingError, AttributeError):
+            # views without retrievable source or unpicklable configs are never cached
+            return None
+        return (self.name, base_config, tuple(views), tuple(literals))
+
+    def apply_many(self, literal_sets, as_generator=False):
+        base_screen = self.screen
+        screens = []
+        try:
+            for literals in literal_sets:
+                self.screen = base_screen.clone()
+                self.assign(literals)
+                self._sort_screen()
+                screens.append(self.screen)
+        finally:
+            self.screen = base_screen
+        root = _PrefixNode()
+        paths = []
+        for screen in screens:
+            node = root
+            node.count += 1
+            path = [root]
+            steps = [('view', field) for field in screen.views]+[('literal', literal) for literal in screen.literals]
+            for step in steps:
+                key = step if isinstance(step[1], str) else (step[0], repr(step[1]))
+                if key not in node.children:
+                    node.children[key] = _PrefixNode(step)
+                node = node.children[key]
+                node.count += 1
+                path.append(node)
+            paths.append(path)
+        root.snapshot = (self.config.clone(), [])
+        configs = (self._apply_variant(screen, path) for screen, path in zip(screens, paths))
+        return configs if as_generator else list(configs)
+
+    def _apply_variant(self, screen, path):
+        depth = max(index for index, node in enumerate(path) if node.snapshot is not None)
+        config, lazy_views = path[depth].snapshot
+        base_config, base_screen = self.config, self.screen
+        self.config = config.clone()
+        # views compiled by Scope.lazy(with_compile=True) register themselves on this screen while running
+        self.screen = ADict(views=[], literals=[], lazy_views=list(lazy_views))
+        self.__class__.current_scope = self
+        try:
+            for node in path[depth+1:]:
+                kind, value = node.step
+                if kind == 'view':
+                    self._run_view(value)
+                else:
+                    self._run_literal(value)
+                # keep a snapshot where remaining variants diverge
+                if node.count > 1 and all(child.count != node.count for child in node.children.values()):
+                    node.snapshot = (self.config.clone(), list(self.screen.lazy_views))
+            compiled_lazy_views = self.screen.lazy_views
+            self.screen = screen
+            for field in compiled_lazy_views:
+                if field not in screen.lazy_views:
+                    screen.lazy_views.append(field)
+            self._compute_and_apply_lazy_views()
+            return self.config
+        finally:
+            for node in path:
+                node.count -= 1
+                if node.count == 0:
+                    node.snapshot = None
+            self.config, self.screen = base_config, base_screen
 
     def __enter__(self):
         if not Scope.parsed:
@@ -426,7 +853,7 @@ class Scope:
     def _is_config_at_positional(self, func, *args, **kwargs):
         if self.name in kwargs:
             return True
-        full_arguments = inspect.getfullargspec(func)[0]
+        full_arguments = _get_full_arguments(func)
         index = full_arguments.index(self.name)
         return {'positional': index+1 < len(args) or len(full_arguments) > len(args), 'index': index}
 
@@ -440,12 +867,21 @@ class Scope:
         return args, kwargs
 
     def exec(self, func):
+        import inspect
+        name = self.name
+        full_arguments = inspect.getfullargspec(func)[0]
+        index = full_arguments.index(name) if name in full_arguments else None
+        num_arguments = len(full_arguments)
+
         @wraps(func)
         def inner(*args, **kwargs):
-            with self._recreate_context():
-                if self.mode == 'ON':
-                    args, kwargs = self.get_config_updated_arguments(func, *args, **kwargs)
-                return func(*args, **kwargs)
+            state = _scope_state.get()
+            local = state.get_locals(self)
+            if not (state.parsed and local['is_applied']):
+                self.__enter__()
+            if local['mode'] == 'ON':
+                args, kwargs = _inject_config(func, name, index, num_arguments, local['config'], args, kwargs)
+            return func(*args, **kwargs)
 
         return inner
 
@@ -482,13 +918,15 @@ class Scope:
                 pass
             scope.config.defrost()
         if with_compile and not scope.compute:
-            frame = currentframe().f_back.f_back
-            frame_info = getframeinfo(frame)
+            import inspect
+            frame = inspect.currentframe().f_back.f_back
+            frame_info = inspect.getframeinfo(frame)
             file_name = frame_info.filename
             line = frame.f_lineno
             start_line, end_line = _fine_line_numbers(frame_info, file_name, line)
             with open(file_name, 'r', encoding='utf-8') as f:
                 inner_ctx_lines = list(f.readlines())[start_line:end_line]
+            import uuid
             ctx_name = f"_lazy_context_{str(uuid.uuid4()).replace('-', '_')}"
             inner_ctx_lines = [f'def {ctx_name}({scope.name}):\n']+inner_ctx_lines
             global_vars = frame.f_globals
@@ -498,8 +936,11 @@ class Scope:
 
 
 class MultiScope:
-    def __init__(self, *scopes):
+    def __init__(self, *scopes, max_workers=None):
         self.scopes = scopes
+        self.max_workers = max_workers
+        self.parsed = False
+        self.timings = ADict()
         self.register_all()
 
     def register_all(self):
@@ -507,16 +948,47 @@ class MultiScope:
         for scope in self.scopes:
             Scope.registry[scope.name] = scope
 
+    def _apply_scope(self, scope):
+        start = time.perf_counter()
+        scope.apply()
+        self.timings[scope.name] = time.perf_counter()-start
+
+    def apply_all(self):
+        pending = [scope for scope in self.scopes if not scope.is_applied]
+        if len(pending) < 2 or (len(sys.argv) >= 2 and sys.argv[1] in ('--help', '-h', 'manual')):
+            for scope in pending:
+                self._apply_scope(scope)
+            return
+        from concurrent.futures import ThreadPoolExecutor, wait
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(pending)) as executor:
+            futures = [
+                executor.submit(copy_context().run, self._apply_scope, scope)
+                for scope in pending
+            ]
+            wait(futures)
+        # every scope has finished here, so the reported error does not depend on scheduling
+        for future in futures:
+            future.result()
+
     def __call__(self, func):
+        import inspect
+        arguments = inspect.getfullargspec(func)
+        name_spaces = set(arguments.args+arguments.kwonlyargs)
+        num_arguments = len(arguments.args)
+        targets = [
+            (scope, arguments.args.index(scope.name) if scope.name in arguments.args else None)
+            for scope in self.scopes
+            if scope.name in name_spaces or arguments.varkw is not None
+        ]
+
+        @wraps(func)
         def decorator(*args, **kwargs):
-            # if not Scope.parsed:
-            parse_args_pythonic()
-            arguments = inspect.getfullargspec(func)
-            name_spaces = set(arguments.args+arguments.kwonlyargs)
-            for scope in self.scopes:
-                if scope.name in name_spaces or arguments.varkw is not None:
-                    args, kwargs = scope.get_config_updated_arguments(func, *args, **kwargs)
-                scope.apply()
+            if not self.parsed:
+                parse_args_pythonic()
+                self.parsed = True
+            self.apply_all()
+            for scope, index in targets:
+                args, kwargs = _inject_config(func, scope.name, index, num_arguments, scope.config, args, kwargs)
             return func(*args, **kwargs)
 
         return decorator
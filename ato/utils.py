@@ -1,4 +1,50 @@
-from typing import Iterable, Union, Sequence, Optional, Dict
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Sequence
+from itertools import product
+
+
+# every spelling of the case-insensitive constants, so that one lookup decides them
+_CONSTANTS = {
+    ''.join(spelling): constant
+    for name, constant in (('none', None), ('true', True), ('false', False))
+    for spelling in product(*zip(name, name.upper()))
+}
+_EMPTY_MARKERS = {'[Empty Sequence]': list, '[Empty Mapping]': dict}
+# e+, or e-, with only e+ pairs in between; a legacy float may contain these and '.' anywhere besides its digits
+_EXPONENT = r'(?:[eE]\.*\+|[eE](?:\.*[eE]\.*\+)*\.*-)'
+# the usual decimal and scientific spellings are tried first, since most floats take that branch
+_NUMBER = re.compile(
+    r'\d+\.?\d*(?:[eE][+-]\d+)?|\.\d+(?:[eE][+-]\d+)?|'
+    rf'\.*(?:{_EXPONENT}\.*)*\d[\d.]*(?:{_EXPONENT}[\d.]*)*'
+)
+# the same shape with any non-ASCII character in place of a digit
+_NUMBER_LIKE = re.compile(
+    rf'\.*(?:{_EXPONENT}\.*)*[^\x00-\x2f\x3a-\x7f][^\x00-\x2d\x2f\x3a-\x7f]*'
+    rf'(?:{_EXPONENT}[^\x00-\x2d\x2f\x3a-\x7f]*)*'
+)
+
+
+def _convert_empty_marker(value):
+    marker = _EMPTY_MARKERS.get(value)
+    return value if marker is None else marker()
+
+
+def _convert_float(value):
+    if _NUMBER.fullmatch(value):
+        return float(value)
+    elif value.isascii() or not _NUMBER_LIKE.fullmatch(value):
+        return value
+    # float() rejects the non-decimal numeric characters it would have been given, as before
+    return float(value) if all(c.isnumeric() for c in value if c > '\x7f') else value
+
+
+# a scalar's kind is decided by its first character; any other ASCII character starts a plain string
+_CONVERTERS = {
+    '[': _convert_empty_marker,
+    **dict.fromkeys('0123456789.eE', _convert_float)
+}
 
 
 def is_seq(x):
@@ -16,8 +62,8 @@ def _to_ord(s):
 
 def replace_all(
     string: str,
-    sources: Union[Sequence[str], str],
-    mappings: Optional[Union[Dict[str, str], Sequence[str], str]] = None
+    sources: Sequence[str] | str,
+    mappings: dict[str, str] | Sequence[str] | str | None = None
 ):
     if mappings is None:
         mappings = {}
@@ -35,21 +81,13 @@ def remove_all(string, targets):
 
 
 def convert_string_to_value(value):
-    if not isinstance(value, str):
+    if not isinstance(value, str) or not value:
         return value
-    if value.lower() == 'none':
-        return None
-    elif value.lower() == 'true':
-        return True
-    elif value.lower() == 'false':
-        return False
-    elif value == '[Empty Sequence]':
-        return []
-    elif value == '[Empty Mapping]':
-        return dict()
+    elif value in _CONSTANTS:
+        return _CONSTANTS[value]
     elif value.isdecimal():
         return int(value)
-    elif remove_all(value.lower(), ('.', 'e+', 'e-')).isnumeric():
-        return float(value)
-    else:
-        return value
+    converter = _CONVERTERS.get(value[0])
+    if converter is not None:
+        return converter(value)
+    return value if value[0] < '\x80' else _convert_float(value)
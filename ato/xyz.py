@@ -1,10 +1,16 @@
 import os
-from typing import Iterable
+from collections.abc import Iterable
+from itertools import chain
 
 from ato.utils import convert_string_to_value
 
 
+_DECODING_FORMAT_PREFIXES = ('key-prefix', 'key-postfix', 'index-prefix', 'index-postfix')
+
+
 class GlobalParser:
+    __slots__ = ('value', 'node_type', 'value_type', 'parent', 'children', 'format_dict')
+
     def __init__(self, value, value_type, parent=None, format_dict=None):
         self.value = int(value) if value_type == 'index' else value
         self.node_type = 'value'  # initialized to value
@@ -67,63 +73,138 @@ class GlobalParser:
         return xyz_raw_str
 
     def __repr__(self):
-        return f'Node({", ".join([f"{name}={value}" for name, value in vars(self).items()])})'
+        return f'Node({", ".join([f"{name}={getattr(self, name)}" for name in self.__slots__])})'
 
 
 # Modifying function to handle custom postfix for keys and indices more dynamically
-def convert_lines_to_tree(lines, format_dict=None):
-    root = GlobalParser('root', 'key')
-    current_node = root
-    current_indent = -1
-
+def _iter_line_events(lines, format_dict=None, select=None):
     format_dict = format_dict or dict()
     key_prefix = format_dict.get('key_prefix', '')
     key_postfix = format_dict.get('key_postfix', ':')
     index_prefix = format_dict.get('index_prefix', '')
     index_postfix = format_dict.get('index_postfix', ')')
+    select = select or []
+    num_selected = len(select)
+    depth = 0  # open nodes below the root
+    current_indent = -1
+    skip_indent = None
+    found = not select
 
-    while lines:
-        line = lines.pop(0)
+    for line in lines:
         line = line.rstrip()
-        indent = len(line)-len(line.lstrip())
-        stripped_line = line.strip()
-
-        # Conditions for custom prefix and postfix
-        prefix_cond = lambda prefix: (not prefix or stripped_line.startswith(prefix))
-        postfix_cond = lambda postfix: postfix in stripped_line
-
-        while current_node and indent <= current_indent:
-            current_node = current_node.parent
-            current_indent -= 2  # Assuming 2 spaces for each indent level
-        if prefix_cond(key_prefix) and postfix_cond(key_postfix):
-            tokens = stripped_line.split(key_postfix)
-            key = tokens.pop(0).strip()[len(key_prefix):]
-            new_node = GlobalParser(key, 'key', current_node)
-            current_node.add_child(new_node)
-            current_node = new_node
-            current_indent = indent
-            if tokens[0]:
-                indent += 2
-                lines = [' '*indent+key_postfix.join(tokens).strip()]+lines
-        elif prefix_cond(index_prefix) and postfix_cond(index_postfix):
-            tokens = stripped_line.split(index_postfix)
-            index = tokens.pop(0).strip()[len(index_prefix):]
-            new_node = GlobalParser(index, 'index', current_node)
-            current_node.add_child(new_node)
-            current_node = new_node
+        stripped_line = line.lstrip()
+        indent = len(line)-len(stripped_line)
+        if skip_indent is not None:
+            if indent > skip_indent:
+                continue
+            skip_indent = None
+        # inline remainders such as "key: value" continue in this loop, two spaces deeper
+        while stripped_line is not None:
+            while indent <= current_indent:
+                if depth == 0:
+                    raise ValueError(f'Inconsistent indentation at line: {line!r}')
+                if depth == num_selected and found:
+                    return
+                if depth > num_selected:
+                    yield 'end', None
+                depth -= 1
+                current_indent -= 2  # Assuming 2 spaces for each indent level
+            if (not key_prefix or stripped_line.startswith(key_prefix)) and key_postfix in stripped_line:
+                event, prefix, postfix = 'start_key', key_prefix, key_postfix
+            elif (not index_prefix or stripped_line.startswith(index_prefix)) and index_postfix in stripped_line:
+                event, prefix, postfix = 'start_index', index_prefix, index_postfix
+            else:
+                if depth >= num_selected:
+                    yield 'value', convert_string_to_value(stripped_line)
+                break
+            name, _, remainder = stripped_line.partition(postfix)
+            name = name.strip()[len(prefix):]
+            if event == 'start_index':
+                name = int(name)
+            if depth < num_selected:
+                if str(name) != select[depth]:
+                    # the whole subtree is outside of the selection
+                    skip_indent = indent
+                    break
+                if depth+1 == num_selected:
+                    found = True
+            else:
+                yield event, name
+            depth += 1
             current_indent = indent
-            if tokens[0]:
+            if remainder and not remainder.startswith(postfix):
                 indent += 2
-                lines = [' '*indent+index_postfix.join(tokens).strip()]+lines
+                stripped_line = remainder.strip()
+            else:
+                stripped_line = None
+    if not found:
+        raise KeyError('.'.join(select))
+    for _ in range(depth-num_selected):
+        yield 'end', None
+
+
+def convert_lines_to_tree(lines, format_dict=None):
+    root = GlobalParser('root', 'key')
+    stack = [root]
+    for event, payload in _iter_line_events(lines, format_dict):
+        if event == 'end':
+            stack.pop()
+        elif event == 'value':
+            stack[-1].add_child(GlobalParser(payload, 'value', stack[-1]))
         else:
-            value = convert_string_to_value(stripped_line)
-            new_node = GlobalParser(value, 'value', current_node)
-            current_node.add_child(new_node)
-            current_node = new_node.parent
+            new_node = GlobalParser(payload, 'key' if event == 'start_key' else 'index', stack[-1])
+            stack[-1].add_child(new_node)
+            stack.append(new_node)
     # Remove the root node from the tree
     return root
 
 
+class _Unconvertible:
+    # a subtree convert_tree_to_structure would fail on; the error only surfaces if a parent uses it
+    __slots__ = ('error',)
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _resolve(structure):
+    if isinstance(structure, _Unconvertible):
+        raise structure.error
+    return structure
+
+
+def _convert_node_to_structure(node_type, children):
+    if node_type == 'item':
+        return children[0][0]
+    elif node_type == 'dict':
+        return {value: _resolve(structure) for value, structure in children}
+    elif node_type == 'iter':
+        children_list = [None]*max([value+1 for value, _ in children])
+        for value, structure in children:
+            children_list[value] = _resolve(structure)
+        return children_list
+
+
+def build_structure(events):
+    # same rules as convert_tree_to_structure, applied as soon as a node ends so no tree is kept
+    stack = [[None, 'value', []]]
+    for event, payload in events:
+        if event == 'end':
+            value, node_type, children = stack.pop()
+            try:
+                structure = _convert_node_to_structure(node_type, children)
+            except (TypeError, ValueError, IndexError) as e:
+                structure = _Unconvertible(e)
+            stack[-1][2].append((value, structure))
+        elif event == 'value':
+            stack[-1][1] = 'item'
+            stack[-1][2].append((payload, None))
+        else:
+            stack[-1][1] = 'dict' if event == 'start_key' else 'iter'
+            stack.append([payload, 'value', []])
+    return _convert_node_to_structure(*stack[0][1:])
+
+
 def convert_structure_to_tree(struct, root=None, format_dict=None):
     format_dict = format_dict or dict()
     if root is None:
@@ -171,10 +252,7 @@ def parse_lines(lines):
     decoding_formats = []
     data_lines = []
     for line in lines:
-        is_decoding_format = any(
-            map(lambda text: line.startswith(text), ('key-prefix', 'key-postfix', 'index-prefix', 'index-postfix'))
-        )
-        if is_decoding_format:
+        if line.startswith(_DECODING_FORMAT_PREFIXES):
             decoding_formats.append(line)
         else:
             data_lines.append(line)
@@ -206,23 +284,121 @@ def loads(raw_str):
     lines = raw_str.strip().split('\n')
     decoding_formats, lines = parse_lines(lines)
     format_dict = parse_format(decoding_formats)
-    root = convert_lines_to_tree(lines, format_dict)
-    return convert_tree_to_structure(root)
+    return build_structure(_iter_line_events(lines, format_dict))
+
+
+def _iter_structure_chunks(struct, level, affixes):
+    if isinstance(struct, dict):
+        if not struct:
+            yield ' [Empty Mapping]'
+            return
+        prefix, postfix = affixes['key']
+        keys = struct
+    elif isinstance(struct, Iterable) and not isinstance(struct, str):
+        prefix, postfix = affixes['index']
+        keys = range(len(struct)) if isinstance(struct, (list, tuple)) else [index for index, _ in enumerate(struct)]
+        if not keys:
+            yield ' [Empty Sequence]'
+            return
+    else:
+        yield ' '+str(struct)
+        return
+    indent = '  '*level
+    for key in keys:
+        line = indent+prefix+str(key)+postfix
+        # a nested dumps() used to drop a leading line break of its own output
+        yield '\n'+(line[1:] if line.startswith('\n') else line)
+        yield from _iter_structure_chunks(struct[key], level+1, affixes)
+
+
+def iter_dumps(obj, format_dict=None):
+    format_dict = format_dict or dict()
+    if format_dict:
+        affixes = dict(
+            key=(format_dict.get('key_prefix', ''), format_dict.get('key_postfix', '') or ':'),
+            index=(format_dict.get('index_prefix', ''), format_dict.get('index_postfix', '') or ')')
+        )
+        chunks = chain((f'{key} -> {value}\n' for key, value in format_dict.items()), _iter_structure_chunks(obj, 0, affixes))
+    else:
+        chunks = _iter_structure_chunks(obj, 0, dict(key=('', ':'), index=('', ')')))
+    # like GlobalParser.dumps, a line break at the very start of the output is dropped
+    for chunk in chunks:
+        if chunk:
+            yield chunk[1:] if chunk.startswith('\n') else chunk
+            break
+    yield from chunks
 
 
 def dumps(obj, format_dict=None):
-    return convert_structure_to_tree(obj, format_dict=format_dict).dumps()
+    return ''.join(iter_dumps(obj, format_dict=format_dict))
 
 
 def dump(obj, path_or_file, format_dict=None):
     if isinstance(path_or_file, (str, os.PathLike)):
         with open(path_or_file, 'w') as f:
-            f.write(dumps(obj, format_dict=format_dict))
+            f.writelines(iter_dumps(obj, format_dict=format_dict))
+    else:
+        path_or_file.writelines(iter_dumps(obj, format_dict=format_dict))
+
+
+def _iter_file_events(f, select=None):
+    if not f.seekable():
+        decoding_formats, lines = parse_lines(f.readlines())
+        yield from _iter_line_events(lines, parse_format(decoding_formats), select=select)
+        return
+    # decoding formats may appear anywhere, so they are collected in a first pass
+    start = f.tell()
+    decoding_formats = [line for line in f if line.startswith(_DECODING_FORMAT_PREFIXES)]
+    f.seek(start)
+    lines = (line for line in f if not line.startswith(_DECODING_FORMAT_PREFIXES))
+    yield from _iter_line_events(lines, parse_format(decoding_formats), select=select)
+
+
+def iter_events(path_or_file, select=None):
+    if isinstance(select, str):
+        select = select.split('.')
+    if isinstance(path_or_file, (str, os.PathLike)):
+        with open(path_or_file, 'r') as f:
+            yield from _iter_file_events(f, select=select)
     else:
-        path_or_file.write(dumps(obj, format_dict=format_dict))
+        yield from _iter_file_events(path_or_file, select=select)
+
+
+def _iter_mapped_lines(mapped):
+    start = 0
+    size = len(mapped)
+    find = mapped.find
+    while start < size:
+        end = find(b'\n', start)
+        end = size if end < 0 else end+1
+        yield mapped[start:end]
+        start = end
+
+
+def _iter_mapped_events(f, select=None):
+    import locale
+    import mmap
+    if isinstance(select, str):
+        select = select.split('.')
+    if os.fstat(f.fileno()).st_size == 0:
+        yield from _iter_line_events([], select=select)
+        return
+    encoding = getattr(f, 'encoding', None) or locale.getpreferredencoding(False)
+    prefixes = tuple(prefix.encode(encoding) for prefix in _DECODING_FORMAT_PREFIXES)
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        decoding_formats = [line.decode(encoding) for line in _iter_mapped_lines(mapped) if line.startswith(prefixes)]
+        lines = (line.decode(encoding) for line in _iter_mapped_lines(mapped) if not line.startswith(prefixes))
+        yield from _iter_line_events(lines, parse_format(decoding_formats), select=select)
 
 
-def load(path_or_file):
+def load(path_or_file, select=None, use_mmap=False):
+    if use_mmap:
+        if isinstance(path_or_file, (str, os.PathLike)):
+            with open(path_or_file, 'rb') as f:
+                return build_structure(_iter_mapped_events(f, select=select))
+        return build_structure(_iter_mapped_events(path_or_file, select=select))
+    if select is not None:
+        return build_structure(iter_events(path_or_file, select=select))
     if isinstance(path_or_file, (str, os.PathLike)):
         with open(path_or_file, 'r') as f:
             lines = list(f.readlines())
@@ -230,5 +406,4 @@ def load(path_or_file):
         lines = list(path_or_file.readlines())
     decoding_formats, lines = parse_lines(lines)
     format_dict = parse_format(decoding_formats)
-    root = convert_lines_to_tree(lines, format_dict=format_dict)
-    return convert_tree_to_structure(root)
+    return build_structure(_iter_line_events(lines, format_dict))
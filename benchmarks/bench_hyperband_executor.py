@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ato.adict import ADict
+from ato.hyperopt.executors import ProcessPoolTrialExecutor
+from ato.hyperopt.hyperband import HyperBand
+from ato.scope import Scope
+
+WORK = 100000
+
+
+def estimator(config):
+    # a CPU-bound stand-in for a short training run
+    lr = config.lr
+    total = 0.0
+    for step in range(WORK):
+        total += lr/(step+1)
+    return total*config.batch_size
+
+
+def main():
+    global WORK
+    parser = argparse.ArgumentParser(description='Wall time of a HyperBand run, serial versus a process pool.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, os.cpu_count()])
+    parser.add_argument('--work', type=int, default=WORK)
+    args = parser.parse_args()
+    WORK = args.work
+    sys.argv = sys.argv[:1]
+    scope = Scope(config=ADict(lr=0.1, batch_size=1), name='config')
+    search_spaces = ADict(
+        lr=ADict(param_type='FLOAT', param_range=(1e-4, 1e-1), num_samples=20, space_type='LOG'),
+        batch_size=ADict(param_type='INTEGER', param_range=(8, 128), num_samples=10, space_type='LOG')
+    )
+    print(f'{os.cpu_count()} cpus, {args.work} steps per trial')
+    baseline = None
+    for num_workers in (None, *sorted(set(args.workers))):
+        executor = ProcessPoolTrialExecutor(num_workers=num_workers) if num_workers else None
+        hyperband = HyperBand(scope, search_spaces, 0.3, 4, executor=executor)
+        start = time.perf_counter()
+        result = hyperband.main(estimator)()
+        elapsed = time.perf_counter()-start
+        baseline = baseline or elapsed
+        name = f'{num_workers} workers' if num_workers else 'serial'
+        print(f'{name:>12}: {elapsed:7.2f} s ({baseline/elapsed:.2f}x), best metric {result.metric:.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('yaml', 'toml', 'json', 'numpy', 'torch', 'argparse', 'ast', 'pickle', 'inspect', 'typing')
+LINE_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def measure(module, pycache_prefix):
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPATH'] = ROOT+os.pathsep+env.get('PYTHONPATH', '')
+    command = [
+        sys.executable, '-X', 'importtime', '-X', f'pycache_prefix={pycache_prefix}', '-c',
+        f'import sys; import {module}; print(",".join(sorted(sys.modules)))'
+    ]
+    completed = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    timings = dict()
+    for line in completed.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings, set(completed.stdout.strip().split(','))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold import cost of ato modules (python -X importtime).')
+    parser.add_argument('--module', default='ato.scope')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=None, help='fail if the median exceeds this budget')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as pycache_prefix:
+        measure(args.module, pycache_prefix)  # warm the bytecode cache
+        runs = [measure(args.module, pycache_prefix) for _ in range(args.repeat)]
+    cumulative = [timings[args.module]/1000 for timings, _ in runs]
+    median = statistics.median(cumulative)
+    print(f'{args.module}: median {median:.2f} ms, min {min(cumulative):.2f} ms over {args.repeat} cold imports')
+    timings, loaded = runs[-1]
+    print('heavy modules loaded:', ', '.join(name for name in HEAVY_MODULES if name in loaded) or 'none')
+    print('slowest imports (cumulative us):')
+    for name, value in sorted(timings.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f'  {value:>8}  {name}')
+    if args.max_ms is not None and median > args.max_ms:
+        print(f'FAILED: {median:.2f} ms exceeds the {args.max_ms:.2f} ms budget')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
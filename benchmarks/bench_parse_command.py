@@ -0,0 +1,52 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ato.parser import parse_command
+
+
+def build_literal(rng, index):
+    kind = index%4
+    if kind == 0:
+        return f'model.layer_{index}.lr={rng.random():.6f}'
+    elif kind == 1:
+        return f'data.paths_{index}=[{", ".join(f"%/data/shard_{i}.tar%" for i in range(8))}]'
+    elif kind == 2:
+        return f'prompt_{index}=%a prompt with spaces and %% escapes {index}%'
+    return f'view_{index}'
+
+
+def measure(commands, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for command in commands:
+            parse_command(command)
+        timings.append(time.perf_counter()-start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of ato.parser.parse_command.')
+    parser.add_argument('--literals', type=int, default=20000, help='literals in the single large command')
+    parser.add_argument('--commands', type=int, default=5000, help='number of short sweep commands')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    large_command = ' '.join(build_literal(rng, index) for index in range(args.literals))
+    sweep_commands = [
+        ' '.join(build_literal(rng, index) for index in range(rng.randint(4, 12)))
+        for _ in range(args.commands)
+    ]
+    for name, commands in (('large command', [large_command]), ('sweep commands', sweep_commands)):
+        elapsed = measure(commands, args.repeat)
+        size = sum(len(command) for command in commands)
+        print(f'{name:>14}: {elapsed*1e3:8.2f} ms, {size/elapsed/1e6:6.2f} MB/s ({len(commands)} commands, {size} chars)')
+
+
+if __name__ == '__main__':
+    main()
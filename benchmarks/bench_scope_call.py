@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import timeit
+from functools import wraps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ato.adict import ADict
+from ato.scope import Scope
+
+
+def legacy_exec(scope, func):
+    # the per-call path used before signature analysis moved to decoration time
+    @wraps(func)
+    def inner(*args, **kwargs):
+        with scope._recreate_context():
+            if scope.mode == 'ON':
+                args, kwargs = scope.get_config_updated_arguments(func, *args, **kwargs)
+            return func(*args, **kwargs)
+
+    return inner
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-call overhead of @scope-decorated functions.')
+    parser.add_argument('--calls', type=int, default=1000000)
+    args = parser.parse_args()
+    sys.argv = sys.argv[:1]
+    scope = Scope(config=ADict(lr=0.1), name='config')
+
+    def step(config, x):
+        return x
+
+    def bare_step(x):
+        return x
+
+    fast_step = scope(step)
+    slow_step = legacy_exec(scope, step)
+    fast_step(1)
+    results = dict(
+        baseline=timeit.timeit(lambda: bare_step(1), number=args.calls),
+        legacy=timeit.timeit(lambda: slow_step(1), number=args.calls),
+        scope=timeit.timeit(lambda: fast_step(1), number=args.calls)
+    )
+    for name, elapsed in results.items():
+        print(f'{name:>8}: {elapsed:.3f} s for {args.calls} calls ({elapsed/args.calls*1e9:.0f} ns/call)')
+    print(f'speedup over legacy: {results["legacy"]/results["scope"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
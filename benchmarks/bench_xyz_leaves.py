@@ -0,0 +1,60 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ato import xyz
+from ato.utils import convert_string_to_value
+
+LEAVES = ('128', '0.001', '3.5', 'True', 'none', 'adamw', 'resnet50', '[Empty Mapping]', '1e-4', '/data/train')
+
+
+def build_document(num_leaves):
+    lines = []
+    for index in range(0, num_leaves, 10):
+        lines.append(f'block_{index}:')
+        lines.extend(f'  leaf_{offset}: {leaf}' for offset, leaf in enumerate(LEAVES))
+    return '\n'.join(lines)
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter()-start)
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return min(timings), retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scalar decoding and node memory of xyz on a large document.')
+    parser.add_argument('--leaves', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    document = build_document(args.leaves)
+    leaves = [line.split(': ', 1)[1] for line in document.split('\n') if ': ' in line]
+    lines = document.split('\n')
+    cases = (
+        ('convert_string_to_value', lambda: [convert_string_to_value(leaf) for leaf in leaves]),
+        ('convert_lines_to_tree', lambda: xyz.convert_lines_to_tree(lines)),
+        ('loads', lambda: xyz.loads(document))
+    )
+    print(f'{len(leaves)} leaves, {len(lines)} lines')
+    for name, fn in cases:
+        elapsed, retained, peak = measure(fn, args.repeat)
+        print(f'{name:>24}: {elapsed*1e3:9.1f} ms, retained {retained/2**20:7.1f} MiB, peak {peak/2**20:7.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
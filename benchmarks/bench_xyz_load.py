@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ato import xyz
+
+
+def build_document(num_lines):
+    # each section is 8 lines: a key, an inline key: value, a nested list and a nested inline value
+    lines = []
+    index = 0
+    while len(lines) < num_lines:
+        lines.extend([
+            f'section_{index}:',
+            f'  name: run_{index}',
+            '  values:',
+            '    0) 0.5',
+            '    1) 1e-3',
+            '    2) None',
+            '  nested:',
+            f'    depth: {index%7}'
+        ])
+        index += 1
+    return '\n'.join(lines[:num_lines])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scaling of xyz.loads with document size.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    args = parser.parse_args()
+    baseline = None
+    for num_lines in args.sizes:
+        document = build_document(num_lines)
+        start = time.perf_counter()
+        xyz.loads(document)
+        elapsed = time.perf_counter()-start
+        per_line = elapsed/num_lines*1e6
+        baseline = baseline or per_line
+        print(f'{num_lines:>9} lines: {elapsed*1e3:10.1f} ms, {per_line:6.2f} us/line ({per_line/baseline:.2f}x the smallest size)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ato import xyz
+from bench_xyz_load import build_document
+
+
+def measure(path, **kwargs):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    structure = xyz.load(path, **kwargs)
+    elapsed = time.perf_counter()-start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del structure
+    return elapsed, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak Python heap of xyz.load with and without mmap.')
+    parser.add_argument('--lines', type=int, default=500000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'document.xyz')
+        with open(path, 'w') as f:
+            f.write(build_document(args.lines))
+        size = os.path.getsize(path)
+        print(f'{args.lines} lines, {size/2**20:.1f} MiB on disk')
+        for name, kwargs in (('readlines', dict()), ('mmap', dict(use_mmap=True))):
+            elapsed, retained, peak = measure(path, **kwargs)
+            print(
+                f'{name:>10}: {elapsed:6.2f} s, peak {peak/2**20:7.1f} MiB, result {retained/2**20:7.1f} MiB '
+                f'(peak/result {peak/retained:.2f})'
+            )
+    # mapped pages belong to the page cache and are not Python allocations, so tracemalloc does not count them
+
+
+if __name__ == '__main__':
+    main()
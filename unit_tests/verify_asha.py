@@ -0,0 +1,113 @@
+import multiprocessing
+import time
+import unittest
+
+from ato.adict import ADict
+from ato.hyperopt.asha import ASHA
+from ato.hyperopt.executors import AsyncTrialExecutor, ProcessPoolTrialExecutor
+from ato.scope import Scope
+
+
+def budgeted_estimator(unit_test_config):
+    # slower models make the workers heterogeneous
+    time.sleep(0.002*len(unit_test_config.model_type))
+    return unit_test_config.lr*unit_test_config.batch_size*unit_test_config.__budget__
+
+
+async def async_budgeted_estimator(unit_test_config):
+    return budgeted_estimator(unit_test_config)
+
+
+def failing_estimator(unit_test_config):
+    if unit_test_config.model_type != 'resnet50':
+        raise RuntimeError(unit_test_config.model_type)
+    time.sleep(5)
+    return unit_test_config.lr
+
+
+class TestASHA(unittest.TestCase):
+    def setUp(self):
+        Scope.initialize_registry()
+        self.scope = Scope(name='unit_test_config')
+        self.search_spaces = ADict(
+            lr=ADict(param_type='FLOAT', param_range=(0.0001, 0.1), num_samples=8, space_type='LOG'),
+            batch_size=ADict(param_type='INTEGER', param_range=(1, 64), num_samples=10, space_type='LOG'),
+            model_type=ADict(param_type='CATEGORY', categories=('resnet50', 'resnet101', 'swin_s', 'vit-s'))
+        )
+        self.executor = ProcessPoolTrialExecutor(num_workers=3, mp_context=multiprocessing.get_context('fork'))
+
+    def test_asha_promotions(self):
+        asha = ASHA(self.scope, self.search_spaces, 1/3, 27, num_trials=60, executor=self.executor, seed=0)
+        self.assertEqual(asha.get_budgets(), [1, 3, 9, 27])
+        results = asha.main(budgeted_estimator)()
+        self.assertEqual(len(results.logs[0]), 60)
+        self.assertEqual(len(results.logs), 4)
+        for budget, log in zip(asha.get_budgets(), results.logs):
+            self.assertTrue(all(config.__budget__ == budget for config in log))
+        for lower, upper in zip(results.logs, results.logs[1:]):
+            self.assertLessEqual(len(upper), len(lower))
+            self.assertGreaterEqual(len(upper), int(len(lower)/3))
+        self.assertEqual(len(results.promotions), sum(len(log) for log in results.logs[1:]))
+        self.assertEqual(results.total_budget, sum(config.__budget__ for log in results.logs for config in log))
+        self.assertEqual(results.metric, max(config.__metric__ for config in results.logs[-1]))
+        self.assertEqual(results.metric, results.config.__metric__)
+        self.assertTrue(all(config.__num_halved__ == rung for rung, log in enumerate(results.logs) for config in log))
+
+    def test_asha_promotes_before_rung_completes(self):
+        completed = []
+
+        class RecordingASHA(ASHA):
+            def get_promotable(self, rungs, promoted):
+                job = super().get_promotable(rungs, promoted)
+                if job is not None:
+                    completed.append(len(rungs[0]))
+                return job
+
+        asha = RecordingASHA(self.scope, self.search_spaces, 1/3, 9, num_trials=30, executor=self.executor, seed=0)
+        results = asha.main(budgeted_estimator)()
+        self.assertEqual(results.promotions[0].rung, 1)
+        self.assertEqual(results.promotions[0].budget, 3)
+        self.assertEqual(len(completed), len(results.promotions))
+        self.assertLess(completed[0], 30)
+
+    def test_mode_min(self):
+        asha = ASHA(self.scope, self.search_spaces, 0.5, 4, num_trials=16, mode='min', executor=self.executor, seed=1)
+        results = asha.main(budgeted_estimator)()
+        self.assertEqual(results.metric, min(config.__metric__ for config in results.logs[-1]))
+
+
+    def test_incremental_ranking(self):
+        import random
+        rng = random.Random(0)
+        for mode in ('max', 'min'):
+            asha = ASHA(self.scope, self.search_spaces, 0.5, 4, mode=mode, executor=self.executor)
+            results = [ADict(__metric__=rng.choice([0.1, 0.2, 0.3, float('-inf')])) for _ in range(50)]
+            entries = []
+            for index, config in enumerate(results):
+                asha.rank(entries, config, index)
+            expected = sorted(range(len(results)), key=lambda index: results[index].__metric__, reverse=mode == 'max')
+            self.assertEqual([index for _, index in entries], expected)
+
+    def test_async_estimator(self):
+        with self.assertRaises(ValueError):
+            ASHA(self.scope, self.search_spaces, 0.5, 4, executor=AsyncTrialExecutor())
+        # async estimators run on the process pool, one event loop per trial
+        expected = ASHA(self.scope, self.search_spaces, 0.5, 4, num_trials=16, executor=self.executor, seed=1)
+        asha = ASHA(self.scope, self.search_spaces, 0.5, 4, num_trials=16, executor=self.executor, seed=1)
+        results = asha.main(async_budgeted_estimator)()
+        self.assertEqual(len(results.logs[0]), 16)
+        self.assertEqual(
+            sorted(config.__metric__ for config in results.logs[0]),
+            sorted(config.__metric__ for config in expected.main(budgeted_estimator)().logs[0])
+        )
+
+    def test_error_does_not_wait_for_running_trials(self):
+        asha = ASHA(self.scope, self.search_spaces, 0.5, 4, num_trials=16, executor=self.executor, seed=1)
+        start = time.perf_counter()
+        with self.assertRaises(RuntimeError):
+            asha.main(failing_estimator)()
+        self.assertLess(time.perf_counter()-start, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+
+from ato.adict import ADict
+from ato.hyperopt.base import RandomSpaceMixIn
+from ato.hyperopt.checkpoint import FileCheckpoint, SQLCheckpoint
+from ato.hyperopt.hyperband import HyperBand
+from ato.scope import Scope
+from verify_hyperband import Preempted, describe, make_estimator
+
+
+class CountingCheckpoint(FileCheckpoint):
+    def __init__(self, path):
+        super().__init__(path)
+        self.num_saves = 0
+        self.num_appends = 0
+
+    def save(self, state):
+        self.num_saves += 1
+        super().save(state)
+
+    def append(self, record):
+        self.num_appends += 1
+        super().append(record)
+
+
+class RandomHyperBand(HyperBand, RandomSpaceMixIn):
+    pass
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        Scope.initialize_registry()
+        self.scope = Scope(name='unit_test_config')
+        self.search_spaces = ADict(
+            lr=ADict(param_type='FLOAT', param_range=(0.0001, 0.1), num_samples=6, space_type='LOG'),
+            batch_size=ADict(param_type='INTEGER', param_range=(1, 64), num_samples=5, space_type='LOG')
+        )
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def assert_resumes(self, checkpoint, search_spaces=None, **options):
+        search_spaces = search_spaces or self.search_spaces
+        calls = []
+        expected = HyperBand(self.scope, search_spaces, 0.5, 2, **options).main(make_estimator(calls))()
+        num_calls = len(calls)
+        for preempt_at in (1, num_calls//3, num_calls-1, num_calls):
+            checkpoint.clear()
+            calls = []
+            hyperband = HyperBand(self.scope, search_spaces, 0.5, 2, checkpoint=checkpoint, **options)
+            with self.assertRaises(Preempted):
+                hyperband.main(make_estimator(calls, preempt_at))()
+            resumed = HyperBand(self.scope, search_spaces, 0.5, 2, checkpoint=checkpoint, **options)
+            results = resumed.main(make_estimator(calls))()
+            # only the preempted trial runs twice
+            self.assertEqual(len(calls), num_calls+1)
+            self.assertEqual(calls[preempt_at-1], calls[preempt_at])
+            self.assertEqual(describe(results), describe(expected))
+            self.assertEqual(resumed.config.__hyperopt_id__, hyperband.config.__hyperopt_id__)
+            self.assertEqual(results.config.__hyperopt_id__, hyperband.config.__hyperopt_id__)
+            finished = HyperBand(self.scope, search_spaces, 0.5, 2, checkpoint=checkpoint, **options)
+            self.assertEqual(describe(finished.main(make_estimator(calls))()), describe(expected))
+            self.assertEqual(len(calls), num_calls+1)
+        return expected
+
+    def test_file_checkpoint(self):
+        checkpoint = FileCheckpoint(os.path.join(self.temp_dir.name, 'search', 'hyperband.pkl'))
+        self.assert_resumes(checkpoint)
+        self.assertTrue(os.path.exists(checkpoint.path))
+        self.assertEqual(os.listdir(os.path.dirname(checkpoint.path)), ['hyperband.pkl'])
+
+    def test_file_checkpoint_brackets(self):
+        checkpoint = FileCheckpoint(os.path.join(self.temp_dir.name, 'hyperband.pkl'))
+        expected = self.assert_resumes(checkpoint, max_budget=9, min_budget=1, seed=0)
+        self.assertEqual(len(expected.brackets), 4)
+
+    def test_journal_compaction(self):
+        search_spaces = ADict(
+            lr=ADict(param_type='FLOAT', param_range=(0.0001, 0.1), num_samples=20, space_type='LOG'),
+            batch_size=ADict(param_type='INTEGER', param_range=(1, 512), num_samples=10, space_type='LOG')
+        )
+        checkpoint = CountingCheckpoint(os.path.join(self.temp_dir.name, 'hyperband.pkl'))
+        self.assert_resumes(checkpoint, search_spaces)
+        checkpoint.clear()
+        checkpoint.num_saves = checkpoint.num_appends = 0
+        calls = []
+        HyperBand(self.scope, search_spaces, 0.5, 2, checkpoint=checkpoint).main(make_estimator(calls))()
+        # every trial is one appended record; snapshots are only taken when the journal doubles the history
+        self.assertGreater(len(calls), 300)
+        self.assertLessEqual(checkpoint.num_saves, 6)
+        self.assertGreater(checkpoint.num_appends, len(calls)-checkpoint.num_saves)
+
+    def test_truncated_record(self):
+        checkpoint = FileCheckpoint(os.path.join(self.temp_dir.name, 'hyperband.pkl'))
+        checkpoint.save(ADict(step=0))
+        checkpoint.append(('trial', 0, ADict(lr=0.1)))
+        size = os.path.getsize(checkpoint.path)
+        checkpoint.append(('trial', 1, ADict(lr=0.2)))
+        with open(checkpoint.path, 'r+b') as f:
+            f.truncate(os.path.getsize(checkpoint.path)-3)
+        state, records = checkpoint.load()
+        self.assertEqual(state, ADict(step=0))
+        self.assertEqual(records, [('trial', 0, ADict(lr=0.1))])
+        self.assertEqual(os.path.getsize(checkpoint.path), size)
+        checkpoint.append(('trial', 2, ADict(lr=0.3)))
+        self.assertEqual([record[1] for record in checkpoint.load()[1]], [0, 2])
+
+    def test_unseeded_sampled_space(self):
+        checkpoint = FileCheckpoint(os.path.join(self.temp_dir.name, 'hyperband.pkl'))
+        for options in (dict(), dict(max_budget=9, min_budget=1)):
+            checkpoint.clear()
+            calls = []
+            options.update(checkpoint=checkpoint, space_options=dict(num_samples=16))
+            hyperband = RandomHyperBand(self.scope, self.search_spaces, 0.5, 2, **options)
+            with self.assertRaises(Preempted):
+                hyperband.main(make_estimator(calls, 5))()
+            resumed = RandomHyperBand(self.scope, self.search_spaces, 0.5, 2, **options)
+            self.assertNotEqual(resumed.distributions.samples, hyperband.distributions.samples)
+            results = resumed.main(make_estimator(calls))()
+            # the resumed search continues on the sample that was drawn before the crash
+            self.assertEqual(resumed.distributions.samples, hyperband.distributions.samples)
+            self.assertTrue({config['lr'] for config in calls} <= set(hyperband.distributions.samples.lr))
+            self.assertEqual(calls[4], calls[5])
+            # only the preempted trial runs twice; without budgets the winner is estimated once more
+            self.assertEqual(len(calls), sum(len(log) for log in results.logs)+1)
+
+    def test_sql_checkpoint(self):
+        db_path = f'sqlite:///{os.path.join(self.temp_dir.name, "ato.db")}'
+        checkpoint = SQLCheckpoint(db_path, 'hyperband')
+        self.assert_resumes(checkpoint)
+        self.assertIsNotNone(SQLCheckpoint(db_path, 'hyperband').load())
+        self.assertIsNone(SQLCheckpoint(db_path, 'other').load())
+        checkpoint.engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
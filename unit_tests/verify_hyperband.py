@@ -1,5 +1,7 @@
 import os
 import random
+import subprocess
+import sys
 import unittest
 
 try:
@@ -12,10 +14,45 @@ except ImportError:
     dist = None
 
 from ato.adict import ADict
+from ato.hyperopt.base import GridSpace, LatinHypercubeSpaceMixIn, RandomSpaceMixIn, SobolSpaceMixIn, sample_sobol
+from ato.hyperopt.cache import TrialCache
+from ato.hyperopt.executors import AsyncTrialExecutor, ProcessPoolTrialExecutor
 from ato.hyperopt.hyperband import HyperBand, DistributedHyperBand
 from ato.scope import Scope
 
 
+class Preempted(Exception):
+    pass
+
+
+def make_estimator(calls, preempt_at=None):
+    # records every config it trains and raises Preempted on the preempt_at-th call, like a driver dying mid-search
+    def estimator(unit_test_config):
+        calls.append(unit_test_config.to_dict())
+        if len(calls) == preempt_at:
+            raise Preempted()
+        return unit_test_config.lr*unit_test_config.batch_size*unit_test_config.get('__budget__', 1)
+
+    return estimator
+
+
+def describe(results):
+    return [[(config.lr, config.batch_size, config.__metric__) for config in log] for log in results.logs]
+
+
+def deterministic_estimator(unit_test_config):
+    unit_test_config.visited = os.getpid()
+    return unit_test_config.lr*unit_test_config.batch_size+len(unit_test_config.model_type)
+
+
+class CountingGridSpace(GridSpace):
+    num_reads = 0
+
+    def get_config(self, index):
+        CountingGridSpace.num_reads += 1
+        return super().get_config(index)
+
+
 class TestHyperBand(unittest.TestCase):
     def setUp(self):
         Scope.initialize_registry()
@@ -53,6 +90,218 @@ class TestHyperBand(unittest.TestCase):
         optimized_steps = self.hyperband.compute_optimized_initial_training_steps(24)
         self.assertTrue(all(map(lambda step: isinstance(step, (int, float)) and step > 0, optimized_steps)))
 
+    def test_multi_bracket(self):
+        budgets = []
+
+        def estimator(unit_test_config):
+            budgets.append(unit_test_config.__budget__)
+            return deterministic_estimator(unit_test_config)*unit_test_config.__budget__
+
+        hyperband = HyperBand(self.scope, self.search_spaces, 1/3, 1, None, max_budget=81, seed=0)
+        self.assertEqual(
+            [(bracket.num_configs, bracket.budgets) for bracket in hyperband.get_brackets()],
+            [(81, [1, 3, 9, 27, 81]), (34, [3, 9, 27, 81]), (15, [9, 27, 81]), (8, [27, 81]), (5, [81])]
+        )
+        results = hyperband.main(estimator)()
+        self.assertEqual(results.total_budget, sum(budgets))
+        self.assertEqual(len(results.brackets), 5)
+        self.assertEqual(len(results.logs), 5+4+3+2+1)
+        self.assertEqual([len(log) for log in results.brackets[0].logs], [81, 27, 9, 3, 1])
+        for bracket in results.brackets:
+            for budget, log in zip(bracket.budgets, bracket.logs):
+                self.assertTrue(all(config.__budget__ == budget for config in log))
+        finalists = [bracket.logs[-1][0] for bracket in results.brackets]
+        self.assertEqual(results.metric, max(config.__metric__ for config in finalists))
+        self.assertEqual(results.config.__budget__, 81)
+        self.assertLess(results.total_budget, 81*sum(bracket.num_configs for bracket in results.brackets))
+
+        repeated = HyperBand(self.scope, self.search_spaces, 1/3, 1, None, max_budget=81, seed=0).main(estimator)()
+        for key in self.search_spaces:
+            self.assertEqual(repeated.config[key], results.config[key])
+        self.assertEqual(repeated.total_budget, results.total_budget)
+
+    def test_grid_space(self):
+        from copy import deepcopy
+        from itertools import product
+        distributions = self.hyperband.distributions
+        sampling_spaces = distributions.sampling_spaces
+        legacy = []
+        for values in product(*sampling_spaces.values()):
+            config = deepcopy(self.hyperband.config).update(**ADict(zip(sampling_spaces.keys(), values)))
+            config.__num_halved__ = 0
+            legacy.append(config)
+        self.assertEqual(len(distributions), len(legacy))
+        self.assertEqual([config.to_dict() for config in distributions], [config.to_dict() for config in legacy])
+        self.assertEqual([config.to_dict() for config in distributions[7:-3:4]], [config.to_dict() for config in legacy[7:-3:4]])
+        self.assertEqual(distributions[-1].to_dict(), legacy[-1].to_dict())
+        self.assertIsNot(distributions[0], distributions[0])
+        with self.assertRaises(IndexError):
+            distributions[len(legacy)]
+
+        sampled = distributions.sample(10, random.Random(0))
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual(
+            [config.to_dict() for config in sampled],
+            [legacy[index].to_dict() for index in sorted(random.Random(0).sample(range(len(legacy)), 10))]
+        )
+
+        search_spaces = ADict({
+            f'param_{index}': ADict(param_type='FLOAT', param_range=(0.0, 1.0), num_samples=20)
+            for index in range(6)
+        })
+        distributions = HyperBand(self.scope, search_spaces, 0.3, 4, None).distributions
+        self.assertEqual(len(distributions), 20**6)
+        self.assertEqual(len(distributions[1000:2000000:3]), len(range(1000, 2000000, 3)))
+        self.assertEqual(distributions[-1].param_0, 1.0)
+        self.assertEqual(distributions[-1].param_5, 1.0)
+        axis = distributions.sampling_spaces.param_0
+        self.assertEqual([distributions[20*20+21][f'param_{index}'] for index in range(6)], [axis[0]]*3+[axis[1]]*3)
+
+    def test_sampled_spaces(self):
+        import math
+        import numpy as np
+        for mixin in (RandomSpaceMixIn, LatinHypercubeSpaceMixIn, SobolSpaceMixIn):
+            hyperband_class = type(f'{mixin.__name__}HyperBand', (HyperBand, mixin), dict())
+            hyperband = hyperband_class(self.scope, self.search_spaces, 0.5, 4, space_options=dict(num_samples=64, seed=3))
+            distributions = hyperband.distributions
+            self.assertEqual(len(distributions), 64)
+            configs = list(distributions)
+            self.assertTrue(all(config.__num_halved__ == 0 for config in configs))
+            self.assertTrue(all(0.0001 <= config.lr <= 0.1 for config in configs))
+            self.assertTrue(all(isinstance(config.batch_size, int) and 1 <= config.batch_size <= 64 for config in configs))
+            self.assertEqual({config.model_type for config in configs}, set(self.search_spaces.model_type.categories))
+            self.assertEqual(
+                [config.to_dict() for config in distributions[10:20]],
+                [config.to_dict() for config in configs[10:20]]
+            )
+            repeated = hyperband_class(self.scope, self.search_spaces, 0.5, 4, space_options=dict(num_samples=64, seed=3))
+            self.assertEqual(repeated.distributions.samples, distributions.samples)
+            if mixin is not RandomSpaceMixIn:
+                # log-uniform lr is stratified in log space: one sample per 1/64 of the range
+                strata = [int((math.log(config.lr)-math.log(0.0001))/(math.log(0.1)-math.log(0.0001))*64) for config in configs]
+                self.assertEqual(sorted(strata), list(range(64)))
+            results = hyperband.main(deterministic_estimator)()
+            self.assertEqual(results.metric, max(config.__metric__ for config in results.logs[-2]))
+        with self.assertRaises(ValueError):
+            type('SobolHyperBand', (HyperBand, SobolSpaceMixIn), dict())(self.scope, self.search_spaces, 0.5, 4)
+
+        unscrambled = sample_sobol(8, 3, None, scramble=False)
+        self.assertEqual(unscrambled[:, 0].tolist(), [0.0, 0.5, 0.25, 0.75, 0.125, 0.625, 0.375, 0.875])
+        self.assertEqual(unscrambled[:, 2].tolist(), [0.0, 0.5, 0.75, 0.25, 0.375, 0.875, 0.625, 0.125])
+        points = sample_sobol(256, 21, np.random.default_rng(0))
+        for num_points in (2, 16, 256):
+            for column in points[:num_points].T:
+                self.assertEqual(sorted((column*num_points).astype(int).tolist()), list(range(num_points)))
+        with self.assertRaises(ValueError):
+            sample_sobol(4, 22, np.random.default_rng(0))
+
+    def test_process_pool_matches_serial(self):
+        import multiprocessing
+        results = HyperBand(self.scope, self.search_spaces, 0.3, 4, None).main(deterministic_estimator)()
+        executor = ProcessPoolTrialExecutor(num_workers=2, mp_context=multiprocessing.get_context('fork'), max_pending=3)
+        hyperband = HyperBand(self.scope, self.search_spaces, 0.3, 4, None, executor=executor)
+        parallel_results = hyperband.main(deterministic_estimator)()
+        self.assertEqual(parallel_results.metric, results.metric)
+        self.assertEqual(len(parallel_results.logs), len(results.logs))
+        for parallel_log, log in zip(parallel_results.logs[:-1], results.logs[:-1]):
+            self.assertEqual([config.__metric__ for config in parallel_log], [config.__metric__ for config in log])
+            self.assertEqual([config.__num_halved__ for config in parallel_log], [config.__num_halved__ for config in log])
+        self.assertTrue(all(config.visited != os.getpid() for config in parallel_results.logs[0]))
+        self.assertIsNone(hyperband.session)
+
+        distributions = hyperband.distributions[:5]
+        parallel_results = hyperband.estimate(deterministic_estimator, distributions)
+        self.assertEqual(
+            [config.__metric__ for config in parallel_results],
+            [deterministic_estimator(dict_config) for dict_config in map(ADict, distributions)]
+        )
+
+    def test_configs_built_on_demand(self):
+        import asyncio
+        distributions = self.hyperband.distributions
+        space = CountingGridSpace(distributions.base_config, distributions.sampling_spaces, distributions.extra_fields)
+        reads = []
+
+        def estimator(unit_test_config):
+            reads.append(CountingGridSpace.num_reads)
+            return unit_test_config.lr
+
+        async def async_estimator(unit_test_config):
+            reads.append(CountingGridSpace.num_reads)
+            await asyncio.sleep(0)
+            return unit_test_config.lr
+
+        runs = (
+            (estimator, dict(), 1),
+            (estimator, dict(cache=TrialCache()), 1),
+            (async_estimator, dict(executor=AsyncTrialExecutor(max_concurrency=3)), 3)
+        )
+        for fn, options, ahead in runs:
+            CountingGridSpace.num_reads = 0
+            reads.clear()
+            results = HyperBand(self.scope, self.search_spaces, 0.3, 4, None, **options).estimate(fn, space)
+            self.assertEqual(len(results), len(space))
+            self.assertEqual(CountingGridSpace.num_reads, len(space))
+            # configs are built as trials take them, not all before the first one starts
+            self.assertLessEqual(reads[0], ahead)
+            self.assertEqual(reads, sorted(reads))
+            if 'cache' not in options:
+                self.assertTrue(all(num_reads <= position+ahead for position, num_reads in enumerate(reads)))
+
+    def test_async_estimator(self):
+        import asyncio
+        running = ADict(current=0, peak=0)
+
+        async def estimator(unit_test_config):
+            running.current += 1
+            running.peak = max(running.peak, running.current)
+            await asyncio.sleep(0.001)
+            running.current -= 1
+            return deterministic_estimator(unit_test_config)
+
+        results = HyperBand(self.scope, self.search_spaces, 0.3, 4, None).main(deterministic_estimator)()
+        async_results = HyperBand(self.scope, self.search_spaces, 0.3, 4, None).main(estimator)()
+        self.assertEqual(async_results.metric, results.metric)
+        self.assertEqual(
+            [[config.__metric__ for config in log] for log in async_results.logs],
+            [[config.__metric__ for config in log] for log in results.logs]
+        )
+        self.assertEqual(running.peak, len(self.hyperband.distributions))
+
+        running.peak = 0
+        hyperband = HyperBand(self.scope, self.search_spaces, 0.3, 4, None, executor=AsyncTrialExecutor(max_concurrency=7))
+        self.assertEqual(hyperband.main(estimator)().metric, results.metric)
+        self.assertEqual(running.peak, 7)
+
+    def test_async_timeouts(self):
+        import asyncio
+
+        async def estimator(unit_test_config):
+            await asyncio.sleep(10 if unit_test_config.model_type == 'vit-s' else 0)
+            return unit_test_config.lr
+
+        distributions = self.hyperband.distributions[:8]
+        for executor in (AsyncTrialExecutor(timeout=0.05), AsyncTrialExecutor(max_concurrency=4, rung_timeout=0.05)):
+            hyperband = HyperBand(self.scope, self.search_spaces, 0.3, 4, None, mode='min', executor=executor)
+            results = hyperband.estimate(estimator, distributions)
+            self.assertEqual([config.model_type for config in results], [config.model_type for config in distributions])
+            for config in results:
+                if config.model_type == 'vit-s':
+                    self.assertTrue(config.__cancelled__)
+                    self.assertEqual(config.__metric__, float('inf'))
+                else:
+                    self.assertNotIn('__cancelled__', config)
+                    self.assertEqual(config.__metric__, config.lr)
+
+    def test_import_defers_numpy_and_torch(self):
+        loaded = subprocess.run(
+            [sys.executable, '-c', 'import sys, ato.hyperopt.hyperband; print("numpy" in sys.modules, "torch" in sys.modules)'],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+        self.assertEqual(loaded, 'False False')
+
 
 @unittest.skipIf(not TORCH_AVAILABLE, 'PyTorch is not available')
 class TestDistributedHyperBand(unittest.TestCase):
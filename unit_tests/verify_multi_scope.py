@@ -1,4 +1,5 @@
 import sys
+import threading
 import unittest
 
 from ato.scope import Scope, MultiScope
@@ -31,6 +32,18 @@ class MultiScopeTest(unittest.TestCase):
         out = main()
         self.assertEqual(out, ('X', 0.1, 'B', 3.14))
 
+    def test_config_injection(self):
+        sys.argv = ['t.py']
+
+        @self.multi_scope
+        def main(step, config_1, config_2, scale=1):
+            return step, config_1.text, config_2.text, scale
+
+        self.assertEqual(main(3), (3, 'A', 'B', 1))
+        self.assertEqual(main(3, scale=2), (3, 'A', 'B', 2))
+        with self.assertRaises(TypeError):
+            main(3, config_2=None)
+
     def test_priority_chain_independence(self):
         sys.argv = 't.py config_1.config_1_chain config_2.config_2_chain'.split()
 
@@ -56,6 +69,54 @@ class MultiScopeTest(unittest.TestCase):
 
         self.assertEqual(main(), (0.2, 1, 2.0, 9))
 
+    def test_concurrent_apply(self):
+        sys.argv = 't.py config_1.loaded config_2.loaded'.split()
+        barrier = threading.Barrier(2, timeout=5)
+
+        @self.scope_1.observe()
+        def loaded(config_1):
+            barrier.wait()
+            config_1.loaded = True
+
+        @self.scope_2.observe(field='loaded')
+        def loaded_2(config_2):
+            barrier.wait()
+            config_2.loaded = True
+
+        calls = []
+
+        @self.multi_scope
+        def main(config_1, config_2):
+            calls.append(len(config_1.keys())+len(config_2.keys()))
+            return config_1.loaded, config_2.loaded
+
+        self.assertEqual(main(), (True, True))
+        self.assertEqual(main(), (True, True))
+        self.assertEqual(set(self.multi_scope.timings.keys()), {'config_1', 'config_2'})
+        self.assertEqual(calls, [6, 6])
+        self.assertEqual(self.scope_1.screen.views, ['config_1_base', 'loaded'])
+
+    def test_error_order(self):
+        sys.argv = ['t.py']
+        failed = threading.Event()
+
+        @self.scope_1.observe(default=True, priority=1)
+        def broken_1(config_1):
+            failed.wait(timeout=5)
+            raise ValueError('config_1')
+
+        @self.scope_2.observe(default=True, priority=1)
+        def broken_2(config_2):
+            failed.set()
+            raise KeyError('config_2')
+
+        @self.multi_scope
+        def main(config_1, config_2):
+            return config_1, config_2
+
+        with self.assertRaisesRegex(ValueError, 'config_1'):
+            main()
+
 
 if __name__ == "__main__":
     unittest.main()
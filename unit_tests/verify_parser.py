@@ -1,5 +1,123 @@
+import os
+import random
+import tempfile
 import unittest
-from ato.parser import parse_command, parse_value, parse_backtick_string, parse_bracketed_value
+from unittest import mock
+
+from ato import parser
+from ato.parser import parse_command, parse_value, parse_backtick_string, parse_bracketed_value, tokenize
+from ato.parser import iter_tokens, tokenize_file, is_argument_source
+
+
+# character-by-character implementation the tokenizer must stay equivalent to
+def legacy_parse_command(command):
+    tokens = []
+    i = 0
+    length = len(command)
+    while i < length:
+        while i < length and command[i].isspace():
+            i += 1
+        if i >= length:
+            break
+        start = i
+        while i < length and not command[i].isspace() and command[i] != '=':
+            i += 1
+        if i < length and command[i] == '=':
+            key = command[start:i]
+            i += 1
+            if i < length:
+                value, i = legacy_parse_value(command, i)
+            else:
+                value = ''
+            tokens.append(f'{key}={value}')
+        else:
+            token_start = start
+            while i < length and not command[i].isspace():
+                i += 1
+            tokens.append(command[token_start:i])
+    return tokens
+
+
+def legacy_parse_value(command, i):
+    if i < len(command):
+        if command[i] == '%':
+            return legacy_parse_backtick_string(command, i)
+        elif command[i] in ['[', '(', '{']:
+            return legacy_parse_bracketed_value(command, i)
+        else:
+            start = i
+            while i < len(command) and not command[i].isspace():
+                i += 1
+            return command[start:i], i
+    return '', i
+
+
+def legacy_parse_backtick_string(command, i):
+    assert command[i] == '%'
+    i += 1
+    value = ['%']
+    length = len(command)
+    nesting_level = 1
+    while i < length:
+        c = command[i]
+        if c == '\\' and i+1 < length:
+            value.append(c)
+            value.append(command[i+1])
+            i += 2
+        elif c == '%':
+            value.append(c)
+            i += 1
+            if i < length and command[i] == '%':
+                value.append(command[i])
+                i += 1
+            else:
+                nesting_level -= 1
+                if nesting_level == 0:
+                    break
+        elif c == '%':
+            value.append(c)
+            nesting_level += 1
+            i += 1
+        else:
+            value.append(c)
+            i += 1
+    return ''.join(value), i
+
+
+def legacy_parse_bracketed_value(command, i):
+    brackets = {'[': ']', '{': '}', '(': ')'}
+    opening_bracket = command[i]
+    closing_bracket = brackets[opening_bracket]
+    value = [opening_bracket]
+    i += 1
+    length = len(command)
+    stack = [closing_bracket]
+    while i < length and stack:
+        c = command[i]
+        if c == '%':
+            backtick_value, i = legacy_parse_backtick_string(command, i)
+            value.append(backtick_value)
+        elif c == '\\' and i+1 < length:
+            value.append(c)
+            value.append(command[i+1])
+            i += 2
+        elif c in brackets:
+            stack.append(brackets[c])
+            value.append(c)
+            i += 1
+        elif c == stack[-1]:
+            stack.pop()
+            value.append(c)
+            i += 1
+        else:
+            value.append(c)
+            i += 1
+    return ''.join(value), i
+
+
+def random_command(rng, length):
+    alphabet = 'ab=%\\[]{}() ,.\t\n\u00a0\x1cé1'
+    return ''.join(rng.choice(alphabet) for _ in range(length))
 
 
 class ParserUnitTest(unittest.TestCase):
@@ -108,6 +226,97 @@ class ParserUnitTest(unittest.TestCase):
         tokens = parse_command(command)
         self.assertEqual(tokens, ['view1', 'lr=0.1', 'batch_size=32'])
 
+    def test_tokenize(self):
+        command = 'view1 lr=0.1  layers=[1, [2]] =x'
+        tokens = list(tokenize(command))
+        self.assertEqual([(token.key, token.value) for token in tokens], [
+            ('view1', None), ('lr', '0.1'), ('layers', '[1, [2]]'), ('', 'x')
+        ])
+        self.assertEqual([command[token.start:token.end] for token in tokens], [token.text for token in tokens])
+
+    def test_tokenize_edge_cases(self):
+        for command in [
+            'a=', 'a= b', 'a=[1]b', 'a=%x%y', 'a=%%%', 'a=%x%%y%', 'a=%\\%%', 'a=[%]%]', 'a=[(]', 'a=[\\',
+            'a=%unterminated', 'a=[1, %x]%] b', 'a=b=c', '==', 'a\u00a0b=1', 'a=%\\'
+        ]:
+            self.assertEqual(parse_command(command), legacy_parse_command(command), command)
+
+    def test_fuzz_equivalence(self):
+        rng = random.Random(0)
+        for _ in range(20000):
+            command = random_command(rng, rng.randint(0, 24))
+            self.assertEqual(parse_command(command), legacy_parse_command(command), repr(command))
+            i = rng.randint(0, len(command))
+            self.assertEqual(parse_value(command, i), legacy_parse_value(command, i), repr(command))
+            if i < len(command) and command[i] == '%':
+                self.assertEqual(parse_backtick_string(command, i), legacy_parse_backtick_string(command, i))
+            if i < len(command) and command[i] in '[{(':
+                self.assertEqual(parse_bracketed_value(command, i), legacy_parse_bracketed_value(command, i))
+
+    def test_iter_tokens(self):
+        rng = random.Random(1)
+        for _ in range(5000):
+            command = random_command(rng, rng.randint(0, 32))
+            cuts = sorted(rng.sample(range(len(command)+1), min(len(command)+1, rng.randint(0, 6))))
+            chunks = [command[start:end] for start, end in zip([0]+cuts, cuts+[len(command)])]
+            self.assertEqual(list(iter_tokens(chunks)), list(tokenize(command)), repr(chunks))
+
+    def test_iter_tokens_single_characters(self):
+        rng = random.Random(2)
+        for _ in range(2000):
+            command = random_command(rng, rng.randint(0, 24))
+            self.assertEqual(list(iter_tokens(command)), list(tokenize(command)), repr(command))
+
+    def test_iter_tokens_large_value(self):
+        items = ', '.join(f'[{index}, %item {index}%]' for index in range(50000))
+        command = f'before data=[{items}]\nprompt=%{"x"*200000}% after'
+        chunks = [command[index:index+1024] for index in range(0, len(command), 1024)]
+        with mock.patch.object(parser, 'tokenize', wraps=parser.tokenize) as wrapped:
+            tokens = list(iter_tokens(chunks))
+        self.assertEqual(tokens, list(tokenize(command)))
+        self.assertEqual([token.key for token in tokens], ['before', 'data', 'prompt', 'after'])
+        # every completed token is tokenized once, instead of the whole pending buffer per chunk
+        self.assertLessEqual(sum(len(call.args[0]) for call in wrapped.call_args_list), len(command))
+
+    def test_tokenize_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [os.path.join(temp_dir, f'overrides_{index}.txt') for index in range(2)]
+            for path in paths:
+                with open(path, 'w') as f:
+                    f.write('view1\nlr=0.1 layers=[1,\n 2]\nprompt=%multi word%\n')
+            tokens = tokenize_file(paths[0])
+            self.assertEqual([token.text for token in tokens], ['view1', 'lr=0.1', 'layers=[1,\n 2]', 'prompt=%multi word%'])
+            self.assertIs(tokenize_file(paths[0]), tokens)
+            self.assertIs(tokenize_file(paths[1]), tokens)
+            with open(paths[1], 'a') as f:
+                f.write('extra')
+            self.assertEqual(tokenize_file(paths[1])[-1].text, 'extra')
+        self.assertEqual(
+            [is_argument_source(token) for token in tokenize('@args.txt - @ a=@b -x')],
+            [True, True, False, False, False]
+        )
+
+
+    def test_tokenize_file_cache_is_bounded(self):
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(parser._file_digests, 'maxsize', 3), \
+                mock.patch.object(parser._file_tokens, 'maxsize', 3):
+            paths = [os.path.join(temp_dir, f'overrides_{index}.txt') for index in range(8)]
+            for index, path in enumerate(paths):
+                with open(path, 'w') as f:
+                    f.write(f'lr=0.{index}')
+            first = tokenize_file(paths[0])
+            second = tokenize_file(paths[1])
+            for path in paths[2:]:
+                tokenize_file(path)
+                # the first file stays cached while it keeps being used
+                self.assertIs(tokenize_file(paths[0]), first)
+            self.assertEqual(len(parser._file_digests), 3)
+            self.assertEqual(len(parser._file_tokens), 3)
+            # the second one was evicted, so it is read and tokenized again
+            tokens = tokenize_file(paths[1])
+            self.assertEqual(tokens, second)
+            self.assertIsNot(tokens, second)
 
 if __name__ == "__main__":
     unittest.main()
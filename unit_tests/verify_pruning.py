@@ -0,0 +1,123 @@
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from ato.adict import ADict
+from ato.hyperopt.executors import ProcessPoolTrialExecutor
+from ato.hyperopt.hyperband import HyperBand
+from ato.hyperopt.pruning import MedianPruner, PercentilePruner, Trial, TrialPruned, current_trial
+from ato.scope import Scope
+
+
+def curve_estimator(unit_test_config):
+    trial = current_trial()
+    value = 0.0
+    for step in range(10):
+        value = unit_test_config.lr*(step+1)
+        trial.report(step, value)
+        if trial.should_prune():
+            raise TrialPruned()
+    return value
+
+
+class TestPruning(unittest.TestCase):
+    def setUp(self):
+        Scope.initialize_registry()
+        self.scope = Scope(name='unit_test_config')
+        self.search_spaces = ADict(
+            lr=ADict(param_type='FLOAT', param_range=(1.0, 0.1), num_samples=16),
+            model_type=ADict(param_type='CATEGORY', categories=('resnet50', 'vit-s'))
+        )
+
+    def assert_pruned_logs(self, results):
+        first_rung = results.logs[0]
+        pruned = [config for config in first_rung if config.get('__pruned__')]
+        finished = [config for config in first_rung if not config.get('__pruned__')]
+        self.assertTrue(pruned)
+        self.assertTrue(finished)
+        self.assertTrue(all(config.__metric__ < config.lr*10 for config in pruned))
+        self.assertTrue(all(config.__metric__ == config.lr*10 for config in finished))
+        self.assertGreater(min(config.lr for config in finished), min(config.lr for config in pruned))
+
+    def test_percentile_pruner(self):
+        pruner = PercentilePruner(25, num_startup_trials=3, num_warmup_steps=1)
+        for scale in (1.0, 2.0, 3.0, 4.0):
+            pruner.add_curve([0, 1, 2], [scale, scale*2, scale*3])
+        pruner.add_curve([5], [1.0])
+        self.assertEqual(pruner.curves.shape, (5, 4))
+        self.assertTrue(np.isnan(pruner.curves[0, 3]))
+        trial = Trial(pruner, 'max')
+        trial.report(0, 0.0)
+        self.assertFalse(trial.should_prune())
+        trial.report(1, 6.0)
+        self.assertTrue(trial.should_prune())
+        trial.report(2, 12.0)
+        self.assertFalse(trial.should_prune())
+        trial.report(5, 0.0)
+        self.assertFalse(trial.should_prune())
+        trial = Trial(pruner, 'min')
+        trial.report(1, 5.0)
+        self.assertTrue(trial.should_prune())
+        trial.report(2, 3.0)
+        self.assertFalse(trial.should_prune())
+        trial.report(3, float('nan'))
+        self.assertTrue(trial.should_prune())
+        with self.assertRaises(ValueError):
+            PercentilePruner(100)
+
+    def test_threshold_snapshot(self):
+        import pickle
+        pruner = MedianPruner(num_startup_trials=3, num_warmup_steps=1)
+        for index in range(100):
+            pruner.add_curve(list(range(index%7+1)), [float(index+step) for step in range(index%7+1)])
+        self.assertEqual(pruner.curves.shape, (100, 7))
+        self.assertGreaterEqual(len(pruner.buffer), 100)
+        for mode in ('max', 'min'):
+            snapshot = pruner.get_snapshot(mode)
+            self.assertIs(pruner.get_snapshot(mode), snapshot)
+            self.assertEqual(snapshot.thresholds, {step: pruner.get_threshold(step, mode) for step in range(7)})
+            for step, value in ((0, 10.0), (1, 10.0), (3, 60.0), (6, 40.0), (9, 0.0)):
+                trial = Trial(pruner, mode)
+                trial.report(step, value)
+                self.assertEqual(snapshot.should_prune(trial), pruner.should_prune(trial))
+        # the snapshot stays the same size however many curves the pruner holds
+        self.assertLess(len(pickle.dumps(snapshot)), len(pickle.dumps(pruner))/4)
+        pruner.add_curve([0], [0.0])
+        self.assertIsNot(pruner.get_snapshot('min'), snapshot)
+
+    def test_detached_trial(self):
+        self.assertEqual(curve_estimator(ADict(lr=0.5)), 5.0)
+        self.assertFalse(current_trial().should_prune())
+
+    def test_median_pruning_serial(self):
+        pruner = MedianPruner(num_startup_trials=4)
+        hyperband = HyperBand(self.scope, self.search_spaces, 0.5, 4, pruner=pruner)
+        results = hyperband.main(curve_estimator)()
+        self.assert_pruned_logs(results)
+        self.assertEqual(pruner.curves.shape[1], 10)
+        self.assertEqual(pruner.curves.shape[0], sum(len(log) for log in results.logs[:-1]))
+
+    def test_median_pruning_process_pool(self):
+        pruner = MedianPruner(num_startup_trials=4)
+        executor = ProcessPoolTrialExecutor(num_workers=2, mp_context=multiprocessing.get_context('fork'))
+        hyperband = HyperBand(self.scope, self.search_spaces, 0.5, 4, executor=executor, pruner=pruner)
+        results = hyperband.main(curve_estimator)()
+        self.assert_pruned_logs(results)
+        self.assertEqual(pruner.curves.shape[0], sum(len(log) for log in results.logs[:-1]))
+
+    def test_median_pruning_async(self):
+        import asyncio
+
+        async def estimator(unit_test_config):
+            # the best configs finish first, so the later ones are compared against them
+            await asyncio.sleep(0.01*(1.1-unit_test_config.lr))
+            return curve_estimator(unit_test_config)
+
+        hyperband = HyperBand(self.scope, self.search_spaces, 0.5, 4, pruner=MedianPruner(num_startup_trials=4))
+        results = hyperband.main(estimator)()
+        self.assert_pruned_logs(results)
+
+
+if __name__ == '__main__':
+    unittest.main()
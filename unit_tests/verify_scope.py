@@ -1,9 +1,41 @@
+import asyncio
+import io
+import json
+import os
+import subprocess
+import tempfile
 import unittest
+from unittest import mock
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 
 from ato.adict import ADict
-from ato.scope import Scope, parse_args_pythonic
+from ato.scope import Scope, parse_args_pythonic, _code_references, _get_transitive_hash
+
+
+def _scale_v1(value):
+    return value*2
+
+
+def _scale_v2(value):
+    return value*3
+
+
+_scale = _scale_v1
+
+
+def _is_even(value):
+    return value == 0 or _is_odd(value-1)
+
+
+def _is_odd(value):
+    return value != 0 and _is_even(value-1)
+
+
+def _parity(value):
+    return 'even' if _is_even(value) else 'odd'
 
 
 class ScopeUnitTest(unittest.TestCase):
@@ -312,6 +344,49 @@ class ScopeUnitTest(unittest.TestCase):
         fingerprint_6 = scope._traced_data.fingerprints['test_fingerprint']
         self.assertEqual(fingerprint_5, fingerprint_6)
 
+    def test_transitive_trace(self):
+        global _scale
+        scope = self.scope
+
+        @scope.trace(trace_id='train_step', transitive=True)
+        @scope
+        def train_step(unit_test_config):
+            return _scale(unit_test_config.learning_rate)
+
+        fingerprint_1 = scope._traced_data.fingerprints['train_step']
+        self.assertIn(_scale_v1, _code_references)
+        try:
+            _scale = _scale_v2
+            # the same function object picks up the rebound global
+            self.assertNotEqual(_get_transitive_hash(train_step), fingerprint_1)
+
+            @scope.trace(trace_id='train_step', transitive=True)
+            @scope
+            def train_step(unit_test_config):
+                return _scale(unit_test_config.learning_rate)
+
+            fingerprint_2 = scope._traced_data.fingerprints['train_step']
+
+            @scope.trace(trace_id='train_step')
+            @scope
+            def train_step(unit_test_config):
+                return _scale(unit_test_config.learning_rate)
+
+            fingerprint_3 = scope._traced_data.fingerprints['train_step']
+        finally:
+            _scale = _scale_v1
+        self.assertNotEqual(fingerprint_1, fingerprint_2)
+        self.assertNotIn(fingerprint_3, (fingerprint_1, fingerprint_2))
+        self.assertEqual(train_step(), 0.1*2)
+
+    def test_transitive_trace_cycle(self):
+        _code_references.clear()
+        forward = {fn: _get_transitive_hash(fn) for fn in (_is_even, _is_odd, _parity)}
+        _code_references.clear()
+        backward = {fn: _get_transitive_hash(fn) for fn in (_is_odd, _is_even, _parity)}
+        self.assertEqual(forward, backward)
+        self.assertEqual(len(set(forward.values())), 3)
+
     def test_runtime_trace(self):
         scope = self.scope
         init_called = []
@@ -331,6 +406,264 @@ class ScopeUnitTest(unittest.TestCase):
         self.assertTrue(len(init_called) > 0)
         self.assertIn('runtime_trace_test', scope._traced_data.fingerprints)
 
+    def test_isolated_resolution(self):
+        scope = self.scope
+
+        @scope.observe()
+        def double_batch(unit_test_config):
+            unit_test_config.batch_size = unit_test_config.batch_size*2
+
+        def resolve(index):
+            with Scope.isolated(arguments=[f'index={index}', 'double_batch']):
+                @scope
+                def get_config(unit_test_config):
+                    return unit_test_config
+
+                config = get_config()
+                self.assertIs(Scope.current_scope, scope)
+                return config.index, config.batch_size, config.learning_rate
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            results = list(executor.map(resolve, range(10000)))
+        self.assertEqual(results, [(index, 256, 0.1) for index in range(10000)])
+        self.assertNotIn('index', self.config)
+        self.assertEqual(self.config.batch_size, 128)
+        self.assertFalse(scope.is_applied)
+
+    def test_isolated_views(self):
+        scope = self.scope
+
+        @scope.observe()
+        def shared(unit_test_config):
+            unit_test_config.batch_size = 64
+
+        with Scope.isolated(arguments=['shared', 'private']):
+            @scope.observe()
+            def private(unit_test_config):
+                unit_test_config.learning_rate = 0.5
+
+            parse_args_pythonic()
+            scope.apply()
+            self.assertIn('private', scope.views)
+            self.assertEqual((scope.config.batch_size, scope.config.learning_rate), (64, 0.5))
+        self.assertIn('shared', scope.views)
+        self.assertNotIn('private', scope.views)
+        with Scope.isolated(arguments=['private']):
+            parse_args_pythonic()
+            scope.apply()
+            self.assertNotIn('private', scope.views)
+            self.assertEqual(scope.config.learning_rate, 0.1)
+
+    def test_current_scope_in_threads(self):
+        scope = self.scope
+        seen = []
+
+        def read_current_scope():
+            seen.append(Scope.current_scope)
+
+        with scope:
+            thread = threading.Thread(target=read_current_scope)
+            thread.start()
+            thread.join()
+            with Scope.isolated(arguments=[]):
+                read_current_scope()
+                other = Scope(name='other_config')
+                other.apply()
+                read_current_scope()
+            read_current_scope()
+        # plain threads see the scope applied outside of isolated contexts; isolated ones start without one
+        self.assertEqual(seen, [scope, None, other, scope])
+
+    def test_isolated_resolution_in_tasks(self):
+        scope = self.scope
+
+        async def resolve(index):
+            with Scope.isolated(arguments=[]):
+                scope.assign(f'index={index}')
+                await asyncio.sleep(0)
+                scope.apply()
+                await asyncio.sleep(0)
+                return scope.config.index
+
+        async def main():
+            return await asyncio.gather(*(resolve(index) for index in range(64)))
+
+        self.assertEqual(asyncio.run(main()), list(range(64)))
+        self.assertEqual(scope.screen.literals, [])
+
+    def test_apply_many(self):
+        scope = self.scope
+        calls = []
+
+        @scope.observe(default=True)
+        def base(unit_test_config):
+            if not scope.compute:
+                calls.append('base')
+            unit_test_config.factor = 2
+            with Scope.lazy():
+                unit_test_config.scaled_lr = unit_test_config.learning_rate*unit_test_config.factor
+
+        @scope.observe(priority=1)
+        def model_a(unit_test_config):
+            if not scope.compute:
+                calls.append('model_a')
+            unit_test_config.model = 'a'
+
+        @scope.observe(priority=1)
+        def model_b(unit_test_config):
+            if not scope.compute:
+                calls.append('model_b')
+            unit_test_config.model = 'b'
+
+        literal_sets = [
+            ['model_a', 'learning_rate=0.2'],
+            ['model_a', 'learning_rate=0.3'],
+            ['model_b', 'learning_rate=0.2'],
+            ['model_a', 'learning_rate=0.2'],
+            'model_b'
+        ]
+        configs = scope.apply_many(literal_sets)
+        self.assertEqual(
+            [(config.model, config.learning_rate, config.scaled_lr) for config in configs],
+            [('a', 0.2, 0.4), ('a', 0.3, 0.6), ('b', 0.2, 0.4), ('a', 0.2, 0.4), ('b', 0.1, 0.2)]
+        )
+        self.assertEqual(calls, ['base', 'model_a', 'model_b'])
+        self.assertEqual(len({id(config) for config in configs}), len(configs))
+        self.assertNotIn('model', self.config)
+        self.assertEqual(scope.screen.views, ['base'])
+
+        generator = scope.apply_many(literal_sets[:2], as_generator=True)
+        self.assertEqual([config.learning_rate for config in generator], [0.2, 0.3])
+
+    def test_resolution_cache(self):
+        global _scale
+        calls = []
+
+        def build_scope(cache_dir):
+            Scope.initialize_registry()
+            scope = Scope(config=ADict(learning_rate=0.1), name='cached_config', cache_dir=cache_dir)
+
+            @scope.observe(default=True)
+            def scaled(cached_config):
+                calls.append('scaled')
+                cached_config.scaled_lr = _scale(cached_config.learning_rate)
+
+            return scope
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            scope = build_scope(cache_dir)
+            scope.apply()
+            self.assertEqual(scope.resolution_cache.stats, ADict(hits=0, misses=1, stores=1))
+            num_calls = len(calls)
+            scope = build_scope(cache_dir)
+            scope.apply()
+            self.assertEqual(scope.resolution_cache.stats, ADict(hits=1, misses=0, stores=0))
+            self.assertEqual(scope.config.scaled_lr, 0.1*2)
+            self.assertEqual(len(calls), num_calls)
+            try:
+                _scale = _scale_v2
+                scope = build_scope(cache_dir)
+                scope.apply()
+            finally:
+                _scale = _scale_v1
+            self.assertEqual(scope.resolution_cache.stats, ADict(hits=0, misses=1, stores=1))
+            self.assertEqual(scope.config.scaled_lr, 0.1*3)
+            self.assertEqual(len(calls), num_calls*2)
+
+    def test_profile(self):
+        scope = self.scope
+
+        @scope.observe(default=True)
+        def base(unit_test_config):
+            unit_test_config.model = ADict(name='resnet', depth=50)
+            with Scope.lazy():
+                unit_test_config.total_lr = unit_test_config.learning_rate*unit_test_config.batch_size
+
+        @scope.observe(default=True, lazy=True)
+        def finalize(unit_test_config):
+            unit_test_config.buffer = list(range(10000))
+
+        scope.assign(['model.depth=101'])
+        with scope.profile() as profiler:
+            scope.apply()
+        self.assertEqual(
+            [(record.phase, record.name) for record in profiler.records],
+            [('views', 'base'), ('literals', 'model.depth=101'), ('compute', 'base'), ('lazy_views', 'finalize')]
+        )
+        changed_keys = {record.name: record.changed_keys for record in profiler.records}
+        self.assertEqual(changed_keys['base'], ['total_lr'])
+        self.assertEqual(changed_keys['model.depth=101'], ['model.depth'])
+        self.assertGreater(profiler.records[-1].memory_delta, 0)
+        self.assertNotIn('_run_view', vars(scope))
+        summary = profiler.summary().splitlines()
+        self.assertTrue(summary[2].startswith('lazy_views') or summary[2].startswith('views'))
+        self.assertEqual(summary[-1].split()[0], '4')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'trace.json')
+            profiler.export_chrome_trace(path)
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+        self.assertEqual([event['cat'] for event in events], ['views', 'literals', 'compute', 'lazy_views'])
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] >= 0 for event in events))
+
+    def test_call_path(self):
+        scope = self.scope
+
+        @scope
+        def leading(unit_test_config, x, y=1):
+            return unit_test_config.learning_rate, x, y
+
+        @scope
+        def trailing(x, unit_test_config):
+            return x, unit_test_config.batch_size
+
+        @scope
+        def keyword_only(x, *, unit_test_config):
+            return x, unit_test_config.batch_size
+
+        with mock.patch('inspect.getfullargspec', side_effect=AssertionError('introspected per call')):
+            for _ in range(3):
+                self.assertEqual(leading(2), (0.1, 2, 1))
+                self.assertEqual(leading(2, 3), (0.1, 2, 3))
+                self.assertEqual(trailing(2), (2, 128))
+                self.assertEqual(keyword_only(2), (2, 128))
+        with self.assertRaises(TypeError):
+            leading(2, unit_test_config=ADict())
+        with scope.pause():
+            self.assertEqual(trailing(2, unit_test_config=ADict(batch_size=1)), (2, 1))
+
+    def test_argument_sources(self):
+        scope = self.scope
+
+        @scope.observe()
+        def large_batch(unit_test_config):
+            unit_test_config.batch_size = 1024
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'overrides.txt')
+            with open(path, 'w') as f:
+                f.write('large_batch\nlayers=[64,\n 128]\n')
+            stdin = io.StringIO('learning_rate=0.01\nname=%from stdin%\n')
+            with mock.patch('sys.stdin', stdin), Scope.isolated(arguments=[f'@{path}', '-', 'depth=3']):
+                parse_args_pythonic()
+                scope.apply()
+                config = scope.config
+        self.assertEqual(config.batch_size, 1024)
+        self.assertEqual(config.layers, [64, 128])
+        self.assertEqual(config.learning_rate, 0.01)
+        self.assertEqual(config.name, 'from stdin')
+        self.assertEqual(config.depth, 3)
+
+    def test_cold_import_is_lightweight(self):
+        heavy_modules = ['yaml', 'toml', 'json', 'numpy', 'argparse', 'ast', 'pickle', 'inspect']
+        loaded = subprocess.run(
+            [sys.executable, '-c', f'import sys, ato.scope; print([m for m in {heavy_modules} if m in sys.modules])'],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+        self.assertEqual(loaded, '[]')
+
 
 if __name__ == "__main__":
     unittest.main()
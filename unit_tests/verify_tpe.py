@@ -0,0 +1,69 @@
+import math
+import unittest
+
+from ato.adict import ADict
+from ato.hyperopt.tpe import TPE
+from ato.scope import Scope
+
+
+def objective(unit_test_config):
+    # optimum at x=0.3, lr=1e-3, optimizer='adamw'
+    penalty = (unit_test_config.x-0.3)**2+(math.log10(unit_test_config.lr)+3)**2/4
+    return -penalty-(unit_test_config.optimizer != 'adamw')*0.5
+
+
+class TestTPE(unittest.TestCase):
+    def setUp(self):
+        Scope.initialize_registry()
+        self.scope = Scope(name='unit_test_config')
+        self.search_spaces = ADict(
+            x=ADict(param_type='FLOAT', param_range=(-1.0, 1.0)),
+            lr=ADict(param_type='FLOAT', param_range=(1e-5, 1e-1), space_type='LOG'),
+            layers=ADict(param_type='INTEGER', param_range=(1, 8)),
+            optimizer=ADict(param_type='CATEGORY', categories=('sgd', 'adam', 'adamw', 'rmsprop'))
+        )
+
+    def test_tpe_improves_over_startup(self):
+        tpe = TPE(self.scope, self.search_spaces, num_trials=60, num_startup_trials=10, seed=1)
+        results = tpe.main(objective)()
+        self.assertEqual(sum(len(log) for log in results.logs), 60)
+        metrics = [log[0].__metric__ for log in results.logs]
+        self.assertEqual(results.metric, max(metrics))
+        self.assertEqual(results.config.optimizer, 'adamw')
+        self.assertGreater(results.metric, -0.05)
+        self.assertGreater(sum(metrics[-20:])/20, sum(metrics[:10])/10)
+        self.assertTrue(all(1 <= log[0].layers <= 8 and isinstance(log[0].layers, int) for log in results.logs))
+
+    def test_batch_suggestions(self):
+        tpe = TPE(self.scope, self.search_spaces, num_trials=30, batch_size=4, num_startup_trials=8, seed=1)
+        results = tpe.main(objective)()
+        self.assertEqual([len(log) for log in results.logs], [4]*7+[2])
+        for log in results.logs[2:]:
+            self.assertEqual(len({config.x for config in log}), len(log))
+
+    def test_mode_min(self):
+        def negated(unit_test_config):
+            return -objective(unit_test_config)
+
+        tpe = TPE(self.scope, self.search_spaces, num_trials=40, mode='min', seed=2)
+        results = tpe.main(negated)()
+        self.assertEqual(results.metric, min(config.__metric__ for log in results.logs for config in log))
+        self.assertLess(results.metric, 0.1)
+
+    def test_async_estimator(self):
+        async def estimator(unit_test_config):
+            return objective(unit_test_config)
+
+        tpe = TPE(self.scope, self.search_spaces, num_trials=12, batch_size=6, num_startup_trials=6, seed=3)
+        results = tpe.main(estimator)()
+        self.assertEqual([len(log) for log in results.logs], [6, 6])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            TPE(self.scope, self.search_spaces, num_trials=0)
+        with self.assertRaises(ValueError):
+            TPE(self.scope, self.search_spaces, num_trials=10, gamma=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
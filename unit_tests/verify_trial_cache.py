@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from ato.adict import ADict
+from ato.hyperopt.cache import TrialCache
+from ato.hyperopt.executors import ProcessPoolTrialExecutor
+from ato.hyperopt.hyperband import HyperBand
+from ato.hyperopt.pruning import current_trial, MedianPruner, TrialPruned
+from ato.scope import Scope
+from verify_hyperband import describe, make_estimator
+
+
+def prune_best_at_first_rung(unit_test_config):
+    # the best config is pruned at the first rung with a metric high enough to be promoted anyway
+    trial = current_trial()
+    trial.report(0, unit_test_config.lr)
+    if unit_test_config.__num_halved__ == 0 and unit_test_config.lr > 0.9:
+        raise TrialPruned()
+    return unit_test_config.lr*(unit_test_config.__num_halved__+1)
+
+
+async def prune_best_at_first_rung_async(unit_test_config):
+    return prune_best_at_first_rung(unit_test_config)
+
+
+def key_of(config, budget_key='__budget__'):
+    return (config.lr, config.batch_size, config.get(budget_key), config.__num_halved__)
+
+
+class TestTrialCache(unittest.TestCase):
+    def setUp(self):
+        Scope.initialize_registry()
+        self.scope = Scope(name='unit_test_config')
+        # batch_size collapses to duplicates after rounding the log-space to integers
+        self.search_spaces = ADict(
+            lr=ADict(param_type='FLOAT', param_range=(0.0001, 0.1), num_samples=3, space_type='LOG'),
+            batch_size=ADict(param_type='INTEGER', param_range=(1, 4), num_samples=6, space_type='LOG')
+        )
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_key_ignores_bookkeeping_fields(self):
+        config = ADict(lr=0.1, model=ADict(layers=[1, 2]), __metric__=3.0)
+        same = ADict(model=ADict(layers=[1, 2]), lr=0.1, __hyperopt_id__='other')
+        self.assertEqual(TrialCache.get_key(config), TrialCache.get_key(same))
+        self.assertEqual(TrialCache.get_key(config, 3), TrialCache.get_key(same, 3))
+        self.assertNotEqual(TrialCache.get_key(config, 3), TrialCache.get_key(config, 9))
+        self.assertNotEqual(TrialCache.get_key(config), TrialCache.get_key(ADict(lr=0.2, model=config.model)))
+
+    def test_duplicates_are_evaluated_once(self):
+        expected_calls = []
+        expected = HyperBand(self.scope, self.search_spaces, 0.5, 2).main(make_estimator(expected_calls))()
+        calls = []
+        cache = TrialCache()
+        results = HyperBand(self.scope, self.search_spaces, 0.5, 2, cache=cache).main(make_estimator(calls))()
+        self.assertEqual(describe(results), describe(expected))
+        self.assertEqual(len(calls), len({key_of(ADict(config)) for config in calls}))
+        self.assertLess(len(calls), len(expected_calls))
+        self.assertEqual(results.cache_hits, len(expected_calls)-len(calls))
+        self.assertEqual(cache.stats.stores, len(calls))
+
+    def test_final_run_hits_cache(self):
+        calls = []
+        hyperband = HyperBand(self.scope, self.search_spaces, 0.1, 2, cache=TrialCache())
+        results = hyperband.main(make_estimator(calls))()
+        # a halving rate of 0.1 promotes nothing, so the winner is re-estimated with the budget it already had
+        self.assertEqual(len(results.logs), 2)
+        self.assertEqual(len(calls), len(hyperband.distributions)-results.cache_hits+1)
+        self.assertEqual(results.metric, results.logs[0][0].__metric__)
+
+    def test_brackets_share_cache(self):
+        options = dict(max_budget=9, min_budget=1, seed=0)
+        expected_calls = []
+        expected = HyperBand(self.scope, self.search_spaces, 0.5, 2, **options).main(make_estimator(expected_calls))()
+        calls = []
+        results = HyperBand(
+            self.scope,
+            self.search_spaces,
+            0.5,
+            2,
+            cache=TrialCache(),
+            **options
+        ).main(make_estimator(calls))()
+        self.assertEqual(describe(results), describe(expected))
+        self.assertEqual(len(calls)+results.cache_hits, len(expected_calls))
+        self.assertEqual(len(calls), len({key_of(ADict(config)) for config in calls}))
+
+    def test_disk_cache(self):
+        cache_dir = os.path.join(self.temp_dir.name, 'trials')
+        calls = []
+        expected = HyperBand(self.scope, self.search_spaces, 0.5, 2, cache=TrialCache(cache_dir)).main(make_estimator(calls))()
+        num_calls = len(calls)
+        self.assertEqual(len([name for name in os.listdir(cache_dir) if name.endswith('.pkl')]), num_calls)
+        cache = TrialCache(cache_dir)
+        results = HyperBand(self.scope, self.search_spaces, 0.5, 2, cache=cache).main(make_estimator(calls))()
+        self.assertEqual(len(calls), num_calls)
+        self.assertEqual(describe(results), describe(expected))
+        self.assertEqual(cache.stats.misses, 0)
+        cache.clear()
+        self.assertEqual(os.listdir(cache_dir), [])
+
+    def test_pruned_trials_are_not_cached(self):
+        def estimator(unit_test_config):
+            trial = current_trial()
+            for step in range(3):
+                trial.report(step, unit_test_config.lr*unit_test_config.batch_size*(step+1))
+                if trial.should_prune():
+                    raise TrialPruned()
+            return unit_test_config.lr*unit_test_config.batch_size*3
+
+        cache = TrialCache()
+        hyperband = HyperBand(
+            self.scope,
+            self.search_spaces,
+            0.5,
+            2,
+            pruner=MedianPruner(num_startup_trials=2),
+            cache=cache
+        )
+        results = hyperband.main(estimator)()
+        self.assertTrue(any(config.get('__pruned__') for log in results.logs for config in log))
+        self.assertLess(cache.stats.stores, cache.stats.misses)
+        for entry in cache.entries.values():
+            self.assertEqual(entry['metric'], entry['fields']['lr']*entry['fields']['batch_size']*3)
+
+    def test_promoted_pruned_trial(self):
+        search_spaces = ADict(lr=ADict(param_type='FLOAT', param_range=(0.1, 1.0), num_samples=4))
+        runs = (
+            (prune_best_at_first_rung, None),
+            (prune_best_at_first_rung, ProcessPoolTrialExecutor(num_workers=2, mp_context=multiprocessing.get_context('fork'))),
+            (prune_best_at_first_rung_async, None)
+        )
+        for estimator, executor in runs:
+            cache = TrialCache()
+            results = HyperBand(self.scope, search_spaces, 0.5, 2, executor=executor, cache=cache).main(estimator)()
+            first_rung, second_rung = results.logs[:2]
+            self.assertTrue(first_rung[0].get('__pruned__'))
+            # the promoted config finishes its second rung, so it is neither marked pruned nor left out of the cache
+            self.assertEqual(second_rung[0].lr, first_rung[0].lr)
+            self.assertFalse(second_rung[0].get('__pruned__'))
+            self.assertAlmostEqual(second_rung[0].__metric__, second_rung[0].lr*2)
+            # every finished trial is stored, and so is the final run of the winner
+            self.assertEqual(cache.stats.stores, len(first_rung)-1+len(second_rung)+1)
+            self.assertIn(second_rung[0].lr, [entry['fields']['lr'] for entry in cache.entries.values()])
+
+    def test_async_executor(self):
+        calls = []
+
+        async def estimator(unit_test_config):
+            calls.append(unit_test_config.to_dict())
+            return unit_test_config.lr*unit_test_config.batch_size
+
+        expected = HyperBand(self.scope, self.search_spaces, 0.5, 2).main(make_estimator([]))()
+        results = HyperBand(self.scope, self.search_spaces, 0.5, 2, cache=TrialCache()).main(estimator)()
+        self.assertEqual(describe(results), describe(expected))
+        self.assertEqual(len(calls), len({key_of(ADict(config)) for config in calls}))
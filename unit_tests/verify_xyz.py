@@ -1,7 +1,91 @@
+import io
+import itertools
 import unittest
+import random
 import tempfile
 import os
+from unittest import mock
 from ato import xyz
+from ato.utils import convert_string_to_value, remove_all
+
+
+# previous implementation (lines.pop(0) and re-prepending) the index-based parser must match
+def legacy_convert_lines_to_tree(lines, format_dict=None):
+    root = xyz.GlobalParser('root', 'key')
+    current_node = root
+    current_indent = -1
+
+    format_dict = format_dict or dict()
+    key_prefix = format_dict.get('key_prefix', '')
+    key_postfix = format_dict.get('key_postfix', ':')
+    index_prefix = format_dict.get('index_prefix', '')
+    index_postfix = format_dict.get('index_postfix', ')')
+
+    while lines:
+        line = lines.pop(0)
+        line = line.rstrip()
+        indent = len(line)-len(line.lstrip())
+        stripped_line = line.strip()
+
+        # Conditions for custom prefix and postfix
+        prefix_cond = lambda prefix: (not prefix or stripped_line.startswith(prefix))
+        postfix_cond = lambda postfix: postfix in stripped_line
+
+        while current_node and indent <= current_indent:
+            current_node = current_node.parent
+            current_indent -= 2  # Assuming 2 spaces for each indent level
+        if prefix_cond(key_prefix) and postfix_cond(key_postfix):
+            tokens = stripped_line.split(key_postfix)
+            key = tokens.pop(0).strip()[len(key_prefix):]
+            new_node = xyz.GlobalParser(key, 'key', current_node)
+            current_node.add_child(new_node)
+            current_node = new_node
+            current_indent = indent
+            if tokens[0]:
+                indent += 2
+                lines = [' '*indent+key_postfix.join(tokens).strip()]+lines
+        elif prefix_cond(index_prefix) and postfix_cond(index_postfix):
+            tokens = stripped_line.split(index_postfix)
+            index = tokens.pop(0).strip()[len(index_prefix):]
+            new_node = xyz.GlobalParser(index, 'index', current_node)
+            current_node.add_child(new_node)
+            current_node = new_node
+            current_indent = indent
+            if tokens[0]:
+                indent += 2
+                lines = [' '*indent+index_postfix.join(tokens).strip()]+lines
+        else:
+            value = convert_string_to_value(stripped_line)
+            new_node = xyz.GlobalParser(value, 'value', current_node)
+            current_node.add_child(new_node)
+            current_node = new_node.parent
+    # Remove the root node from the tree
+    return root
+
+
+def legacy_convert_string_to_value(value):
+    if not isinstance(value, str):
+        return value
+    if value.lower() == 'none':
+        return None
+    elif value.lower() == 'true':
+        return True
+    elif value.lower() == 'false':
+        return False
+    elif value == '[Empty Sequence]':
+        return []
+    elif value == '[Empty Mapping]':
+        return dict()
+    elif value.isdecimal():
+        return int(value)
+    elif remove_all(value.lower(), ('.', 'e+', 'e-')).isnumeric():
+        return float(value)
+    else:
+        return value
+
+
+def describe(node):
+    return node.value, node.value_type, node.node_type, [describe(child) for child in node.children]
 
 
 class XYZUnitTest(unittest.TestCase):
@@ -197,6 +281,136 @@ class XYZUnitTest(unittest.TestCase):
         self.assertAlmostEqual(restored['pi'], 3.14159)
         self.assertAlmostEqual(restored['e'], 2.71828)
 
+    def test_lines_to_tree_equivalence(self):
+        rng = random.Random(0)
+        pieces = ['a:', 'b: 1', 'c: d: 2', '0)', '1) x', '2) y: 3', 'e:: f', 'g: :', 'None', '3.5', '', 'h:)', '4) 5) 6']
+        format_dicts = [None, dict(key_prefix='- ', key_postfix=' =>', index_prefix='# ', index_postfix=']')]
+        for _ in range(3000):
+            lines = [' '*rng.choice([0, 2, 4, 6])+rng.choice(pieces)+rng.choice(['', '\n', '  ']) for _ in range(rng.randint(1, 12))]
+            format_dict = rng.choice(format_dicts)
+            if format_dict is not None:
+                lines = [line.replace(':', ' =>').replace(')', ']') for line in lines]
+            try:
+                expected = describe(legacy_convert_lines_to_tree(list(lines), format_dict))
+            except (AttributeError, IndexError, ValueError):
+                continue
+            original = list(lines)
+            self.assertEqual(describe(xyz.convert_lines_to_tree(lines, format_dict)), expected, lines)
+            self.assertEqual(lines, original)
+            try:
+                structure = xyz.convert_tree_to_structure(legacy_convert_lines_to_tree(list(lines), format_dict))
+            except (TypeError, ValueError):
+                continue
+            self.assertEqual(xyz.build_structure(xyz._iter_line_events(lines, format_dict)), structure, lines)
+
+    def test_large_document(self):
+        structure = {f'section_{i}': {'values': list(range(20)), 'name': f'n{i}', 'nested': {'x': i*0.5}} for i in range(2000)}
+        self.assertEqual(xyz.loads(xyz.dumps(structure)), structure)
+
+    def test_iter_dumps_matches_tree_dumps(self):
+        rng = random.Random(0)
+
+        def random_structure(depth):
+            kind = rng.randint(0, 5 if depth < 4 else 2)
+            if kind == 0:
+                return rng.choice([1, -2.5, None, True, 'text', '', 'two words', '\nline', 1e-8])
+            elif kind == 1:
+                return rng.choice([{}, [], ()])
+            elif kind == 2:
+                return rng.choice(['x', 0, '\nkey'])
+            elif kind in (3, 4):
+                return {rng.choice(['a', 'b', 'c', '\nd', 'e f', 1]): random_structure(depth+1) for _ in range(rng.randint(1, 4))}
+            return [random_structure(depth+1) for _ in range(rng.randint(1, 4))]
+
+        format_dicts = [None, {}, dict(key_prefix='- ', key_postfix=' =>', index_prefix='# ', index_postfix=']'), dict(key_postfix='')]
+        for _ in range(2000):
+            structure = random_structure(0)
+            format_dict = rng.choice(format_dicts)
+            expected = xyz.convert_structure_to_tree(structure, format_dict=format_dict).dumps()
+            self.assertEqual(xyz.dumps(structure, format_dict=format_dict), expected, repr(structure))
+            self.assertEqual(''.join(xyz.iter_dumps(structure, format_dict=format_dict)), expected)
+
+    def test_dump_streams_chunks(self):
+        chunks = []
+
+        class Writer:
+            def writelines(self, lines):
+                chunks.extend(lines)
+
+        xyz.dump(self.nested_dict, Writer())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), xyz.convert_structure_to_tree(self.nested_dict).dumps())
+
+    def test_iter_events(self):
+        events = list(xyz.iter_events(io.StringIO('a:\n  b: 1\nc:\n  0) x\n  1) [Empty Mapping]\n')))
+        self.assertEqual(events, [
+            ('start_key', 'a'), ('start_key', 'b'), ('value', 1), ('end', None), ('end', None),
+            ('start_key', 'c'), ('start_index', 0), ('value', 'x'), ('end', None),
+            ('start_index', 1), ('value', {}), ('end', None), ('end', None)
+        ])
+        self.assertEqual(xyz.build_structure(events), {'a': {'b': 1}, 'c': ['x', {}]})
+
+    def test_selective_load(self):
+        structure = {
+            'data': {'paths': ['a', 'b'], 'size': 10},
+            'model': {'encoder': {'depth': 12, 'heads': [4, 8]}, 'decoder': {'depth': 6}},
+            'results': [{'loss': 0.5}, {'loss': 0.25}]
+        }
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'config.xyz')
+            xyz.dump(structure, path)
+            self.assertEqual(xyz.load(path, select='model.encoder'), structure['model']['encoder'])
+            self.assertEqual(xyz.load(path, select=['model', 'decoder', 'depth']), 6)
+            self.assertEqual(xyz.load(path, select='results.1'), {'loss': 0.25})
+            self.assertEqual(xyz.load(path, select='data.paths'), ['a', 'b'])
+            with self.assertRaises(KeyError):
+                xyz.load(path, select='model.missing')
+        document = xyz.dumps(structure)+'\nbroken:\n  0) 1\n  ) 2'
+        self.assertEqual(xyz.load(io.StringIO(document), select='model.decoder'), {'depth': 6})
+        with mock.patch('ato.xyz.convert_string_to_value', side_effect=lambda text: text) as converter:
+            xyz.load(io.StringIO(document), select='model.decoder')
+        self.assertEqual(converter.call_count, 1)
+
+    def test_mmap_load(self):
+        structure = {'model': {'name': 'résumé', 'layers': [1, 2.5, None]}, 'flags': [True, False], 'empty': {}}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'config.xyz')
+            xyz.dump(structure, path)
+            self.assertEqual(xyz.load(path, use_mmap=True), xyz.load(path))
+            self.assertEqual(xyz.load(path, use_mmap=True, select='model.layers'), [1, 2.5, None])
+            with open(path) as f:
+                self.assertEqual(xyz.load(f, use_mmap=True), structure)
+            with open(path, 'w') as f:
+                f.write('key-postfix -> =\na = 1\nb =\n  c = [Empty Sequence]')
+            self.assertEqual(xyz.load(path, use_mmap=True), xyz.load(path))
+            self.assertEqual(xyz.load(path, use_mmap=True), {'a': 1, 'b': {'c': []}})
+            open(path, 'w').close()
+            self.assertEqual(xyz.load(path, use_mmap=True), xyz.load(path))
+
+    def test_convert_string_to_value_equivalence(self):
+        def convert(function, value):
+            try:
+                result = function(value)
+            except ValueError:
+                return ValueError
+            return type(result), repr(result)
+
+        rng = random.Random(0)
+        alphabet = '0123456789.eE+-nNoOtTrRuUfFaAlLsS \u00bd\u0663\u212a[]x'
+        values = ['None', 'TRUE', 'fAlSe', '[Empty Sequence]', '[Empty Mapping]', '1e5', '1e+5', '-1.5', '.5', '1.', '..5', 'nan']
+        values += ['1.e-4', '1e+-4', 'e+5', '.e-.5', '1e4', '\u0663.5']
+        values += [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 7))) for _ in range(50000)]
+        # every short spelling over the characters the float grammar cares about
+        for length in range(1, 6):
+            values += [''.join(spelling) for spelling in itertools.product('1.eE+-\u0663', repeat=length)]
+        for value in values:
+            self.assertEqual(convert(convert_string_to_value, value), convert(legacy_convert_string_to_value, value), repr(value))
+
+    def test_node_repr(self):
+        node = xyz.GlobalParser('a', 'key')
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertEqual(repr(node), 'Node(value=a, node_type=value, value_type=key, parent=None, children=[], format_dict=None)')
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file